@@ -0,0 +1,353 @@
+# Copyright (c) 2020 Dmitry Arkhipov <grisumbras@gmail.com>
+#
+# Distributed under the Boost Software License, Version 1.0. (See accompanying
+# file LICENSE or copy at http://www.boost.org/LICENSE_1_0.txt)
+
+
+"""
+Measures wall time of the build phases of projects built with b2-helper:
+cold build, no-op rebuild, rebuild after one source file was touched,
+install and test. Projects are scenarios from test_package and synthetic
+projects with the given numbers of sources. Every phase runs the
+corresponding conan command, so the helper is measured together with
+Boost.Build and the compiler. Results are written as JSON and can be
+compared against a baseline, in which case the script fails if some phase
+became slower than the baseline by more than the threshold or failed.
+
+The helper package has to be exported first, e.g. with
+`conan create . user/testing`.
+"""
+
+
+import argparse
+import json
+import os
+import platform
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+PACKAGE = os.path.dirname(ROOT)
+TEST_PACKAGE = os.path.join(PACKAGE, "test_package")
+
+PHASES = ("cold", "no-op", "touch", "install", "test")
+
+SYNTHETIC_CONANFILE = '''\
+from conans import ConanFile
+import os
+
+
+class Synthetic(ConanFile):
+    """Synthetic project generated by benchmarks/build_phases.py"""
+
+    build_requires = "b2/[*]"
+    python_requires = "%s"
+    python_requires_extend = "b2-helper.Mixin"
+    exports_sources = "*.jam", "*.cpp"
+
+    def build(self):
+        if os.environ.get("B2_HELPER_BENCHMARK_PHASE") == "test":
+            super().test()
+        else:
+            super().build()
+'''
+
+SYNTHETIC_JAMROOT = '''\
+import testing ;
+import package ;
+
+project synthetic ;
+
+lib synthetic : [ glob-tree *.cpp : main.cpp ] : <link>static ;
+exe main : main.cpp synthetic ;
+run main : target-name test ;
+package.install install synthetic : : main : synthetic ;
+explicit test install ;
+'''
+
+# sources are spread over directories, like in real projects
+SOURCES_PER_DIRECTORY = 100
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="build_phases")
+    parser.add_argument(
+        "--sizes", default="10,1000,10000",
+        help="comma-separated numbers of sources of synthetic projects"
+        " (default: 10,1000,10000)",
+    )
+    parser.add_argument(
+        "--scenarios", default="minimal",
+        help="comma-separated test_package scenarios to measure"
+        " (default: minimal)",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=3,
+        help="number of measurements of every phase, the median is reported"
+        " (default: 3)",
+    )
+    parser.add_argument(
+        "--reference", default=default_reference(),
+        help="reference of the helper package (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--jobs", type=int, help="number of parallel jobs of Boost.Build",
+    )
+    parser.add_argument(
+        "--output", default="b2-helper-benchmarks.json",
+        help="file to write results into (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--baseline", help="file with results to compare against",
+    )
+    parser.add_argument(
+        "--threshold", type=float, default=0.1,
+        help="relative slowdown considered a regression (default: 0.1)",
+    )
+    parser.add_argument(
+        "--min-delta", type=float, default=0.1,
+        help="slowdowns of fewer seconds are ignored as noise (default: 0.1)",
+    )
+    parser.add_argument(
+        "--dir", help="directory to create projects in (default: temporary)",
+    )
+    args = parser.parse_args(argv)
+
+    env = dict(
+        os.environ,
+        PACKAGE_REFERENCE=args.reference,
+        PYTHONPATH=os.pathsep.join(
+            [os.path.join(TEST_PACKAGE, "modules")]
+            + [p for p in [os.environ.get("PYTHONPATH")] if p]
+        ),
+    )
+    if args.jobs:
+        env["CONAN_CPU_COUNT"] = str(args.jobs)
+
+    projects = []
+    for size in split_list(args.sizes):
+        projects.append(("synthetic-%s" % size, int(size)))
+    for scenario in split_list(args.scenarios):
+        if not os.path.isdir(os.path.join(TEST_PACKAGE, scenario)):
+            parser.error("unknown scenario %s" % scenario)
+        projects.append((scenario, None))
+
+    root = tempfile.mkdtemp(prefix="b2-helper-bench-", dir=args.dir)
+    results = {}
+    try:
+        for name, size in projects:
+            directory = os.path.join(root, name)
+            if size is None:
+                project = os.path.join(TEST_PACKAGE, name)
+            else:
+                project = create_project(
+                    os.path.join(directory, "project"), size, args.reference,
+                )
+            print("Measuring %s" % name, file=sys.stderr)
+            results[name] = measure(project, directory, env, args.repeat)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    report = dict(
+        reference=args.reference,
+        machine=dict(
+            platform=platform.platform(),
+            python=platform.python_version(),
+            cpus=os.cpu_count(),
+            jobs=args.jobs,
+        ),
+        repeat=args.repeat,
+        results=results,
+    )
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=2, sort_keys=True)
+
+    print_results(results)
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)["results"]
+        regressions = compare(
+            results, baseline, args.threshold, args.min_delta,
+        )
+        if regressions:
+            sys.exit(1)
+
+
+def default_reference():
+    with open(os.path.join(PACKAGE, "conanfile.py")) as file:
+        version = re.search(r'version = "([^"]+)"', file.read()).group(1)
+    return "b2-helper/%s@user/testing" % version
+
+
+def split_list(value):
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def create_project(directory, size, reference):
+    """
+    Creates a project in `directory` with a static library of `size` sources
+    and a test program linked to it.
+    """
+
+    os.makedirs(directory)
+    with open(os.path.join(directory, "conanfile.py"), "w") as file:
+        file.write(SYNTHETIC_CONANFILE % reference)
+    with open(os.path.join(directory, "jamroot.jam"), "w") as file:
+        file.write(SYNTHETIC_JAMROOT)
+
+    for n in range(size):
+        subdirectory = os.path.join(
+            directory, "src", str(n // SOURCES_PER_DIRECTORY)
+        )
+        if n % SOURCES_PER_DIRECTORY == 0:
+            os.makedirs(subdirectory)
+        with open(os.path.join(subdirectory, "f%s.cpp" % n), "w") as file:
+            file.write("int f%s() { return %s; }\n" % (n, n))
+
+    with open(os.path.join(directory, "main.cpp"), "w") as file:
+        file.write("int f0();\nint main() { return f0(); }\n")
+    return directory
+
+
+def measure(project, directory, env, repeat):
+    """
+    Measures every phase of `project` `repeat` times. Returns a dict that
+    maps phase names to median wall time in seconds, or to None if the phase
+    failed or is not supported by the project.
+    """
+
+    log = os.path.join(directory, "log.txt")
+    os.makedirs(directory, exist_ok=True)
+    run(["install", project, "-if", "conan"], directory, env, log)
+    run(["source", project, "-if", "conan", "-sf", "src"], directory, env, log)
+    build = [
+        "build", project,
+        "-if", "conan", "-sf", "src", "-bf", "build", "-pf", "stage",
+    ]
+    package = [
+        "package", project,
+        "-if", "conan", "-sf", "src", "-bf", "build", "-pf", "stage",
+    ]
+    synthetic = os.path.isfile(os.path.join(project, "src", "0", "f0.cpp"))
+    if synthetic:
+        touched = os.path.join(directory, "src", "src", "0", "f0.cpp")
+    else:
+        touched = touched_source(os.path.join(directory, "src"))
+
+    samples = {phase: [] for phase in PHASES}
+    for _ in range(repeat):
+        for folder in ("build", "stage"):
+            shutil.rmtree(os.path.join(directory, folder), ignore_errors=True)
+
+        samples["cold"].append(run(build, directory, env, log))
+        samples["no-op"].append(run(build, directory, env, log))
+        if touched:
+            os.utime(touched, None)
+            samples["touch"].append(run(build, directory, env, log))
+        samples["install"].append(run(package, directory, env, log))
+        if synthetic:
+            samples["test"].append(run(
+                build, directory, dict(env, B2_HELPER_BENCHMARK_PHASE="test"),
+                log,
+            ))
+
+    return {phase: median(samples[phase]) for phase in PHASES}
+
+
+def touched_source(directory):
+    for base, dirs, files in sorted(os.walk(directory)):
+        dirs.sort()
+        for name in sorted(files):
+            if name.endswith((".cpp", ".c")):
+                return os.path.join(base, name)
+    return None
+
+
+def run(args, directory, env, log):
+    """
+    Runs conan with arguments `args` in `directory` appending its output to
+    file `log`. Returns wall time of the command, or None if it failed.
+    """
+
+    with open(log, "a") as output:
+        output.write("$ conan %s\n" % " ".join(args))
+        output.flush()
+        started = time.time()
+        result = subprocess.call(
+            ["conan"] + args,
+            cwd=directory,
+            env=env,
+            stdout=output,
+            stderr=subprocess.STDOUT,
+        )
+        elapsed = time.time() - started
+    if result != 0:
+        print("conan %s failed, see %s" % (args[0], log), file=sys.stderr)
+        return None
+    return elapsed
+
+
+def median(samples):
+    if not samples or None in samples:
+        return None
+    return statistics.median(samples)
+
+
+def print_results(results):
+    width = max(len(name) for name in results)
+    print("%-*s %s" % (width, "project", "".join("%10s" % p for p in PHASES)))
+    for name, phases in results.items():
+        print("%-*s %s" % (width, name, "".join(
+            "%10s" % format_seconds(phases.get(phase)) for phase in PHASES
+        )))
+
+
+def format_seconds(seconds):
+    return "-" if seconds is None else "%.2f" % seconds
+
+
+def compare(results, baseline, threshold, min_delta):
+    """
+    Prints phases that became slower than in `baseline` by more than
+    `threshold` (relative) and `min_delta` seconds, or that failed although
+    they have a baseline. Returns the list of (project, phase) pairs of such
+    phases.
+    """
+
+    regressions = []
+    for name, phases in sorted(results.items()):
+        for phase in PHASES:
+            current = phases.get(phase)
+            previous = baseline.get(name, {}).get(phase)
+            if previous is None:
+                continue
+            if current is None:
+                regressions.append((name, phase))
+                print("Regression: %s %s %.2fs -> failed" % (
+                    name, phase, previous,
+                ))
+                continue
+            if (
+                current > previous * (1 + threshold)
+                and current - previous > min_delta
+            ):
+                regressions.append((name, phase))
+                print("Regression: %s %s %.2fs -> %.2fs (%+.0f%%)" % (
+                    name,
+                    phase,
+                    previous,
+                    current,
+                    (current / previous - 1) * 100 if previous else 100,
+                ))
+    if not regressions:
+        print("No regressions against baseline")
+    return regressions
+
+
+if __name__ == "__main__":
+    main()
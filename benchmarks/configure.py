@@ -0,0 +1,174 @@
+# Copyright (c) 2020 Dmitry Arkhipov <grisumbras@gmail.com>
+#
+# Distributed under the Boost Software License, Version 1.0. (See accompanying
+# file LICENSE or copy at http://www.boost.org/LICENSE_1_0.txt)
+
+
+"""
+Microbenchmarks of the parts of the helper that grow with the size of the
+dependency graph: construction of property sets, rendering of options and
+toolset modules, and `B2.configure()` with many properties and included
+jamfiles. Every benchmark runs at several sizes, time per entry shows
+whether it scales linearly.
+"""
+
+
+import argparse
+import importlib.util
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+PACKAGE = os.path.dirname(ROOT)
+
+
+def load_helper():
+    spec = importlib.util.spec_from_file_location(
+        "b2_helper", os.path.join(PACKAGE, "conanfile.py")
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+helper = load_helper()
+
+
+class Output(object):
+    def info(self, message):
+        pass
+
+    warn = info
+
+
+class Conanfile(object):
+    """The parts of a conanfile used by `B2.configure()`"""
+
+    should_configure = True
+    should_build = True
+    should_install = True
+
+    def __init__(self, directory):
+        self.output = Output()
+        self.source_folder = os.path.join(directory, "src")
+        self.install_folder = os.path.join(directory, "conan")
+        self.build_folder = os.path.join(directory, "build")
+        self.package_folder = os.path.join(directory, "package")
+
+
+def property_set_keys(b2, size):
+    properties = helper.PropertySet(b2, no_defaults=True)
+    for n in range(size):
+        properties["feature_%s" % n] = n
+    return properties
+
+
+def property_set_values(b2, size):
+    properties = helper.PropertySet(b2, no_defaults=True)
+    properties.update(
+        define=["MACRO_%s=%s" % (n, n) for n in range(size)],
+        include=["/deps/package-%s/include" % n for n in range(size)],
+    )
+    return list(properties.flattened())
+
+
+def options_strings(b2, size):
+    options = helper.OptionsProxy(b2)
+    for n in range(size):
+        options["option_%s" % n] = n
+    options.update(x=True, values=list(range(size)))
+    return list(options.strings())
+
+
+def toolset_tuples(b2, size):
+    using = helper.ToolsetModulesProxy()
+    for n in range(size):
+        using(("gcc", str(n)), "g++-%s" % n, cxxflags=["-O2", "-g"])
+    return list(using.tuples())
+
+
+def configure(b2, size):
+    # dependencies often contribute the same definitions and directories
+    b2.properties.update(
+        define=["MACRO_%s=%s" % (n % (size // 2 + 1), n % (size // 2 + 1))
+                for n in range(size)],
+        include=["/deps/package-%s/include" % (n % (size // 2 + 1))
+                 for n in range(size)],
+    )
+    b2.include = [
+        "/deps/package-%s/package.jam" % (n % (size // 2 + 1))
+        for n in range(size)
+    ]
+    # force rendering and writing of the file
+    if os.path.exists(b2.project_config):
+        os.remove(b2.project_config)
+    return b2.configure()
+
+
+def configure_variants(b2, size):
+    for variant in ("debug", "release"):
+        b2.add_variant(dict(
+            ("feature_%s" % n, "%s-%s" % (variant, n)) for n in range(size)
+        ))
+    for n in range(size):
+        b2.properties["feature_%s" % n] = n
+    if os.path.exists(b2.project_config):
+        os.remove(b2.project_config)
+    b2.configure()
+    return list(b2._build_request())
+
+
+BENCHMARKS = (
+    ("PropertySet keys", property_set_keys),
+    ("PropertySet values", property_set_values),
+    ("OptionsProxy.strings", options_strings),
+    ("ToolsetModules.tuples", toolset_tuples),
+    ("B2.configure", configure),
+    ("B2.configure variants", configure_variants),
+)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="configure")
+    parser.add_argument(
+        "--sizes", default="100,1000,10000,100000",
+        help="comma-separated numbers of entries"
+        " (default: 100,1000,10000,100000)",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=3,
+        help="number of runs of every benchmark, the best is reported"
+        " (default: 3)",
+    )
+    args = parser.parse_args(argv)
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+
+    directory = tempfile.mkdtemp(prefix="b2-helper-bench-")
+    try:
+        print("%-22s %10s %12s %12s" % ("benchmark", "entries", "seconds",
+                                        "us/entry"))
+        for name, benchmark in BENCHMARKS:
+            for size in sizes:
+                elapsed = min(
+                    run(benchmark, directory, size)
+                    for _ in range(args.repeat)
+                )
+                print("%-22s %10s %12.4f %12.2f" % (
+                    name, size, elapsed, elapsed / size * 1e6,
+                ))
+    finally:
+        shutil.rmtree(directory)
+
+
+def run(benchmark, directory, size):
+    b2 = helper.B2(Conanfile(directory), no_defaults=True)
+    started = time.perf_counter()
+    benchmark(b2, size)
+    return time.perf_counter() - started
+
+
+if __name__ == "__main__":
+    sys.exit(main())
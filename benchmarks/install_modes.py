@@ -0,0 +1,111 @@
+# Copyright (c) 2020 Dmitry Arkhipov <grisumbras@gmail.com>
+#
+# Distributed under the Boost Software License, Version 1.0. (See accompanying
+# file LICENSE or copy at http://www.boost.org/LICENSE_1_0.txt)
+
+
+"""
+Compares the time it takes to install a synthetic set of build artifacts
+using each of the install modes supported by the launcher. The artifacts are
+created in a temporary directory on the same filesystem as the destination,
+so that hard links and reflinks are possible.
+"""
+
+
+import argparse
+import importlib.util
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+import launcher
+
+
+def load_helper():
+    spec = importlib.util.spec_from_file_location(
+        "b2_helper", os.path.join(ROOT, "conanfile.py")
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+helper = load_helper()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="install_modes")
+    parser.add_argument(
+        "--size", default="2G", help="total size of artifacts (default: 2G)",
+    )
+    parser.add_argument(
+        "--files", type=int, default=16,
+        help="number of artifacts (default: 16)",
+    )
+    parser.add_argument(
+        "--dir", help="directory to create artifacts in (default: temporary)",
+    )
+    args = parser.parse_args(argv)
+
+    root = tempfile.mkdtemp(prefix="b2-helper-bench-", dir=args.dir)
+    try:
+        sources = create_artifacts(
+            os.path.join(root, "build"),
+            helper.parse_size(args.size),
+            args.files,
+        )
+        sync()
+        print("%-10s %10s %12s  %s" % ("mode", "seconds", "MiB/s", "used"))
+        total = sum(os.path.getsize(s) for s in sources)
+        for mode in launcher.INSTALL_MODES:
+            destination = os.path.join(root, mode)
+            elapsed, used = install(sources, destination, mode)
+            print("%-10s %10.3f %12.1f  %s" % (
+                mode,
+                elapsed,
+                total / 2.0 ** 20 / elapsed if elapsed else float("inf"),
+                ", ".join(sorted(used)),
+            ))
+            shutil.rmtree(destination)
+    finally:
+        shutil.rmtree(root)
+
+
+def create_artifacts(directory, size, count):
+    os.makedirs(directory)
+    # random data defeats filesystem compression and deduplication
+    block = os.urandom(1 << 20)
+    sources = []
+    for n in range(count):
+        path = os.path.join(directory, "artifact-%s.a" % n)
+        remaining = size // count
+        with open(path, "wb") as file:
+            while remaining > 0:
+                file.write(block[:remaining])
+                remaining -= len(block)
+        sources.append(path)
+    return sources
+
+
+def install(sources, destination, mode):
+    used = set()
+    started = time.time()
+    for source in sources:
+        target = os.path.join(destination, os.path.basename(source))
+        used.add(launcher.install_file(source, target, mode))
+    sync()
+    return time.time() - started, used
+
+
+def sync():
+    # data is only guaranteed to be written when it is synced
+    if hasattr(os, "sync"):
+        os.sync()
+
+
+if __name__ == "__main__":
+    main()
@@ -11,11 +11,30 @@ from conans import (
 from conans.errors import ConanException
 from conans.util.files import mkdir
 import collections
+import concurrent.futures
+import contextlib
+import cProfile
+import fasteners
 import functools
+import hashlib
+import importlib.util
 import itertools
+import json
+import math
 import numbers
 import os
+import pstats
+import re
+import shlex
+import shutil
+import signal
 import six
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
 
 
 class B2ToolConan(ConanFile):
@@ -25,7 +44,7 @@ class B2ToolConan(ConanFile):
     url = "http://github.com/grisumbras/b2-helper"
     homepage = url
     license = "BSL-1.0"
-    exports = "LICENSE*"
+    exports = "LICENSE*", "launcher.py"
 
     def package_info(self):
         self.info.header_only()
@@ -233,6 +252,26 @@ class OptionsProxy(AttrDict):
 
         return (self._stringify(k, v) for (k, v) in self.items())
 
+    def arguments(self):
+        """
+        Returns a generator that yields command line arguments for options.
+        Arguments are the same as the ones produced by `self.strings()`,
+        except that "O v [v...]" yields separate arguments for the option and
+        every value.
+        """
+
+        for k, v in self.items():
+            if (
+                v is not True
+                and not isinstance(v, six.string_types)
+                and isinstance(v, collections.Iterable)
+            ):
+                yield k
+                for item in v:
+                    yield str(item)
+            else:
+                yield self._stringify(k, v)
+
     def _jamify(self, key):
         if key.startswith('-'):
             return key
@@ -283,10 +322,13 @@ class PropertySet(AttrDict):
 
         super().__init__()
         dict.__setattr__(self, "_b2", b2)
+        dict.__setattr__(self, "_reproducible", False)
 
         if no_defaults:
             return
 
+        self.reproducible = tools.get_env("CONAN_B2_REPRODUCIBLE", False)
+
         for setting in ("os", "arch", "build_type", "compiler", "cppstd"):
             self._init_setting(setting)
         self._init_setting("os_target", "os")
@@ -362,16 +404,78 @@ class PropertySet(AttrDict):
     def toolset(self):
         dict.__delitem__(self, "toolset")
 
+    @property
+    def reproducible(self):
+        """
+        If truthy, the property set also has conditional properties that make
+        builds with gcc and clang independent of the location of source,
+        build, package and dependency folders. The folders are mapped to fixed
+        relative paths with `-ffile-prefix-map` (requires gcc 8 or clang 10)
+        and archives are created without timestamps and owner information.
+        The properties are computed from the associated B2 instance's folders
+        by `self.conditional_properties()`.
+        """
+
+        return self.__dict__["_reproducible"]
+
+    @reproducible.setter
+    def reproducible(self, value):
+        dict.__setattr__(self, "_reproducible", bool(value))
+
+    @reproducible.deleter
+    def reproducible(self):
+        dict.__setattr__(self, "_reproducible", False)
+
     def flattened(self):
+        """
+        Yields pairs of property names and values, one pair for every value
+        of a multi-valued property. Repeated pairs are only yielded once.
+        """
+
+        seen = set()
         for key, value in self.items():
             if (not isinstance(value, six.string_types)
                 and isinstance(value, collections.Iterable)
             ):
                 for subvalue in value:
-                    yield (key, str(subvalue))
+                    item = (key, str(subvalue))
+                    if item not in seen:
+                        seen.add(item)
+                        yield item
             else:
                 yield (key, str(value))
 
+    def conditional_properties(self):
+        """
+        Yields pairs of property names and values of conditional properties.
+        They are conditioned on toolsets, so they are always added to project
+        requirements, rather than to build request.
+        """
+
+        if not self.reproducible:
+            return
+
+        b2 = self._b2
+        mapping = {
+            b2.source_folder: ".",
+            b2.build_folder: "build",
+            b2.package_folder: "package",
+        }
+        deps_cpp_info = getattr(b2.conanfile, "deps_cpp_info", None)
+        for name in getattr(deps_cpp_info, "deps", ()):
+            mapping[deps_cpp_info[name].rootpath] = "deps/" + name
+
+        # the last matching map wins, so more specific paths go last
+        folders = sorted((f for f in mapping if f), key=len)
+        for toolset in ("gcc", "clang"):
+            for folder in folders:
+                yield (
+                    "toolset",
+                    "%s:<cflags>-ffile-prefix-map=%s=%s"
+                    % (toolset, folder, mapping[folder]),
+                )
+            yield ("toolset", "%s,<target-os>linux:<archiveflags>-D" % toolset)
+
     def _init_os(self, host_os):
         if not tools.cross_building(self._b2.conanfile.settings):
             return
@@ -503,6 +607,11 @@ class PropertySet(AttrDict):
             init.append(params)
 
         self["toolset"] = init
+        # compiler cache is applied to this toolset module when the
+        # configuration is rendered
+        self._b2._default_toolset = (
+            (init[0], str(version)) if version else init[0]
+        )
 
         if self._b2.conanfile.settings.get_safe("compiler.cppstd") is not None:
             self._init_cppstd(self._b2.conanfile.settings.compiler.cppstd)
@@ -633,27 +742,45 @@ class Mixin(object):
 
         return builder
 
+    def _b2_builder(self):
+        return self.b2_setup_builder(
+            B2(self, compiler_cache=getattr(self, "b2_compiler_cache", None))
+        )
+
     def build(self):
-        """Configures and builds default targets."""
+        """
+        Configures and builds default targets. If `b2_single_invocation` is
+        truthy, also builds targets `test` and `install` in the same
+        Boost.Build run. If environment variable `CONAN_B2_WATCH` is truthy,
+        keeps rebuilding the targets when sources change (see `B2.watch`).
+        """
 
-        builder = self.b2_setup_builder(B2(self))
+        builder = self._b2_builder()
         builder.configure()
 
         targets = getattr(self, "b2_build_targets", [])
         if isinstance(targets, six.string_types):
             targets = [targets]
-        builder.build(*targets)
+        if tools.get_env("CONAN_B2_WATCH", False):
+            builder.watch(
+                *targets,
+                polling=tools.get_env("CONAN_B2_WATCH_POLLING", False)
+            )
+        elif getattr(self, "b2_single_invocation", False):
+            builder.build_all(*targets)
+        else:
+            builder.build(*targets)
 
     def package(self):
         """Builds target `install`."""
 
-        builder = self.b2_setup_builder(B2(self))
+        builder = self._b2_builder()
         builder.install()
 
     def test(self):
         """Builds target `test`."""
 
-        builder = self.b2_setup_builder(B2(self))
+        builder = self._b2_builder()
         builder.test()
 
 
@@ -662,24 +789,73 @@ class B2(object):
     Build helper for Boost.Build build system.
     """
 
-    def __init__(self, conanfile, no_defaults=False):
+    def __init__(self, conanfile, no_defaults=False, compiler_cache=None):
         """
         :param conanfile: Conanfile instance
         :param no_defaults: disable collecting default values from conanfile's
                             settings and options.
+        :param compiler_cache: compiler cache executable (e.g. ccache or
+                               sccache) that wraps the compiler of the
+                               default toolset. Defaults to the value of
+                               environment variable `CONAN_B2_COMPILER_CACHE`.
         """
 
         self.conanfile = conanfile
         self.include = []
 
+        self.compiler_cache = (
+            compiler_cache or tools.get_env("CONAN_B2_COMPILER_CACHE")
+        )
+        self.compiler_cache_dir = tools.get_env("CONAN_B2_COMPILER_CACHE_DIR")
+        self.compiler_cache_size = tools.get_env(
+            "CONAN_B2_COMPILER_CACHE_SIZE"
+        )
+
+        self.profile = tools.get_env("CONAN_B2_PROFILE", "")
+        self._profiler = None
+
         self.using = ToolsetModulesProxy()
-        self.properties = PropertySet(self, no_defaults)
+        self._default_toolset = None
+        with self._profiling():
+            self.properties = PropertySet(self, no_defaults)
+        self.variants = []
+        self.link_jobs = tools.get_env("CONAN_B2_LINK_JOBS", 0)
+        self.link_locks = os.path.join(
+            tempfile.gettempdir(), "b2-helper-link"
+        )
+        self.up_to_date_check = tools.get_env("CONAN_B2_UP_TO_DATE_CHECK")
+        self.toolset_cache = tools.get_env("CONAN_B2_TOOLSET_CACHE")
+        self.prune_dependencies = tools.get_env(
+            "CONAN_B2_PRUNE_DEPENDENCIES", False
+        )
+        self.trace = tools.get_env("CONAN_B2_TRACE", False)
+        self.explain = tools.get_env("CONAN_B2_EXPLAIN", False)
+        self.compile_commands = tools.get_env(
+            "CONAN_B2_COMPILE_COMMANDS", False
+        )
+        self.command_line_limit = COMMAND_LINE_LIMIT
+        self.install_manifest = tools.get_env(
+            "CONAN_B2_INSTALL_MANIFEST", False
+        )
+        self.install_mode = tools.get_env("CONAN_B2_INSTALL_MODE", "copy")
+        self.incremental_install = tools.get_env(
+            "CONAN_B2_INCREMENTAL_INSTALL", False
+        )
+        self.install_report = None
+        self.summary = None
+        self.action_cache = tools.get_env("CONAN_B2_ACTION_CACHE")
+        self.action_cache_size = tools.get_env(
+            "CONAN_B2_ACTION_CACHE_SIZE", "10G"
+        )
+        self._warned_shell = False
 
         self.options = OptionsProxy(self)
         if not no_defaults:
+            jobs, reason = job_count()
+            self.conanfile.output.info("Using %s jobs: %s" % (jobs, reason))
             self.options.update(
                 hash=True,
-                j=tools.cpu_count(),
+                j=jobs,
                 d=tools.get_env("CONAN_B2_DEBUG", "1"),
                 prefix=self.package_folder,
             )
@@ -738,46 +914,417 @@ class B2(object):
     def project_config(self):
         del self._project_config
 
+    def add_variant(self, *args, **kw):
+        """
+        Add a property set to the build request. If any property sets were
+        added, Boost.Build builds all of them in one run, each in its own
+        build directory. Properties used by any of the added property sets
+        are removed from project requirements; if a property set doesn't
+        specify such property, its value is taken from `self.properties`.
+        For example:
+
+            b2.add_variant(variant="debug", link="shared")
+            b2.add_variant(variant="release", link="static")
+
+        Arguments are the same as for `dict.update`. Returns the new
+        `PropertySet` which can be modified further.
+        """
+
+        with self._profiling():
+            variant = PropertySet(self, no_defaults=True)
+            variant.update(*args, **kw)
+        self.variants.append(variant)
+        return variant
+
     def configure(self):
-        """Create the project configuration file"""
+        """
+        Create the project configuration file. The file is only rewritten
+        (atomically) if its content has changed.
+
+        :returns: True if the configuration file was created or changed.
+        """
         if not self.conanfile.should_configure:
-            return
+            return False
+
+        with self._profiling():
+            mkdir(self.build_folder)
+            toolsets = self._toolset_cache_file()
+            build_info = self._pruned_build_info()
+            return replace_if_changed(
+                self.project_config, self._render_config(toolsets, build_info)
+            )
 
-        mkdir(self.build_folder)
-        path = os.path.relpath(
-            self.conanfile.install_folder, self.source_folder
+    def _render_config(self, toolsets=None, build_info=None):
+        build_info = build_info or os.path.join(
+            self.conanfile.install_folder, "conanbuildinfo.jam"
         )
-        with open(self.project_config, "w") as file:
-            build_info = path_escaped(os.path.join(path, "conanbuildinfo.jam"))
-            file.write((
-                "import path ;\n"
-                "import feature ;\n"
-                "use-packages [ path.make \"{0}\" ] ;\n"
-                "local all-toolsets = [ feature.values toolset ] ;\n"
-            ).format(build_info))
+        build_info = path_escaped(
+            os.path.relpath(build_info, self.source_folder)
+        )
+        lines = [(
+            "import path ;\n"
+            "import feature ;\n"
+            "use-packages [ path.make \"{0}\" ] ;\n"
+            "local all-toolsets = [ feature.values toolset ] ;\n"
+        ).format(build_info)]
+
+        if toolsets:
+            lines.append("include \"%s\" ;\n" % path_escaped(toolsets))
+            lines.append(SHELL_OVERRIDE.format(
+                "local result = $(.b2-helper-shell.$(key)) ;\n"
+                "    if ! $(result)\n"
+                "    {\n"
+                "        result = [ b2-helper.SHELL $(command) : $(2) ] ;\n"
+                "    }"
+            ))
+        lines += self._render_using()
+        if toolsets:
+            lines.append(SHELL_RESTORE)
+
+        if self._launched_rules():
+            lines.append(self._render_launchers())
+
+        # dependencies often share jamfiles, including them again only
+        # slows Boost.Build down
+        for include in unique(self.include):
+            lines.append("include \"%s\" ;\n" % path_escaped(include))
+
+        lines.append("project : requirements\n")
+        lines.extend(
+            "  <%s>%s\n" % (k, path_escaped(v))
+            for k, v in itertools.chain(
+                self._requirements(), self._conditional_requirements()
+            )
+        )
+        lines.append("  ;\n")
 
+        # targets and build request that don't fit into command line
+        lines.append(
+            "import modules ;\n"
+            "local b2-helper-request = [ modules.peek : B2_HELPER_REQUEST ] ;\n"
+            "if $(b2-helper-request) { include $(b2-helper-request) ; }\n"
+        )
 
-            for module in self.using.tuples():
-                if len(module) > 1:
-                    file.write((
-                        "if ! {0} in $(all-toolsets) ||"
-                        " ! [ feature.is-subvalue toolset : {0}"
-                        " : version : {1}"
-                        " ]"
-                    ).format(*module[:2]))
-                else:
-                    file.write("if ! ( %s in $(all-toolsets) )" % module[0])
-                file.write(" { using %s ; }\n" % " : ".join(module))
+        return "".join(lines)
+
+    def _toolset_modules(self):
+        # the compiler of the default toolset is wrapped with compiler cache
+        using = ToolsetModulesProxy(self.using)
+        key = self._default_toolset
+        if not (self.compiler_cache and key in using):
+            return using
+
+        module = key[0] if isinstance(key, tuple) else key
+        args, kw = using[key]
+        args = list(args)
+        command = args[0] if args else ""
+        command = command or {"gcc": "g++", "clang": "clang++"}.get(module)
+        if not command:
+            self.conanfile.output.warn(
+                "Compiler cache is not supported for toolset %s" % module
+            )
+            return using
+
+        args[:1] = ["%s %s" % (self.compiler_cache, command)]
+        if not isinstance(key, tuple):
+            # the command goes after an empty version
+            args = [""] + args
+        using[key] = (args, kw)
+        return using
+
+    def _render_using(self):
+        lines = []
+        for module in self._toolset_modules().tuples():
+            if len(module) > 1 and module[1]:
+                lines.append((
+                    "if ! {0} in $(all-toolsets) ||"
+                    " ! [ feature.is-subvalue toolset : {0}"
+                    " : version : {1}"
+                    " ]"
+                ).format(*module[:2]))
+            else:
+                lines.append("if ! ( %s in $(all-toolsets) )" % module[0])
+            lines.append(" { using %s ; }\n" % " : ".join(module))
+        return lines
+
+    def _pruned_build_info(self):
+        # loading declarations of every dependency takes Boost.Build a lot of
+        # time, so only the ones referenced by project's jamfiles are kept
+        if not self.prune_dependencies:
+            return None
+
+        directory = self.conanfile.install_folder
+        try:
+            names = sorted(
+                n for n in os.listdir(directory)
+                if BUILD_INFO_PATTERN.match(n)
+            )
+            sources = {}
+            for name in names:
+                with open(os.path.join(directory, name)) as file:
+                    sources[name] = file.read()
+        except (IOError, OSError):
+            return None
+        if "conanbuildinfo.jam" not in sources:
+            return None
+
+        packages = BUILD_INFO_PROJECT.findall(sources["conanbuildinfo.jam"])
+        used = referenced_packages(packages, self._project_jamfiles())
+        used = package_closure(used, sources)
+
+        fingerprint = hashlib.sha256(json.dumps({
+            "sources": sources, "used": sorted(used),
+        }, sort_keys=True).encode("utf-8")).hexdigest()
+        cache = os.path.join(self.build_folder, "b2-helper-packages")
+        result = os.path.join(cache, fingerprint, "conanbuildinfo.jam")
+        if os.path.isfile(result):
+            return result
+
+        self.conanfile.output.info(
+            "Using %s of %s dependencies: %s"
+            % (len(used), len(packages), ", ".join(sorted(used)) or "none")
+        )
+        mkdir(cache)
+        temp = tempfile.mkdtemp(dir=cache)
+        try:
+            for name, text in sources.items():
+                tools.save(
+                    os.path.join(temp, name), prune_build_info(text, used)
+                )
+            os.rename(temp, os.path.dirname(result))
+        except OSError:
+            tools.rmdir(temp)
+            if not os.path.isfile(result):
+                raise
+
+        # results for previous dependency graphs are not needed anymore
+        for entry in os.listdir(cache):
+            if entry != fingerprint:
+                tools.rmdir(os.path.join(cache, entry))
+        return result
+
+    def _project_jamfiles(self):
+        excluded = set(
+            os.path.normcase(os.path.abspath(f)) for f in (
+                self.build_folder,
+                self.package_folder,
+                self.conanfile.install_folder,
+            ) if f
+        )
+        for base, dirs, files in os.walk(self.source_folder):
+            dirs[:] = [
+                d for d in dirs
+                if not d.startswith(".")
+                and os.path.normcase(os.path.join(base, d)) not in excluded
+            ]
+            for name in files:
+                lowered = name.lower()
+                if (
+                    lowered.endswith(".jam")
+                    or lowered.startswith(("jamroot", "jamfile"))
+                ) and not BUILD_INFO_PATTERN.match(lowered):
+                    yield os.path.join(base, name)
+        for include in self.include:
+            yield include
+
+    def _toolset_cache_file(self):
+        # toolset modules run commands to detect compiler properties during
+        # initialization, their results are cached in a jam file and replayed
+        if not (self.toolset_cache and self.using):
+            return None
+
+        using = "".join(self._render_using())
+        fingerprint = hashlib.sha256(json.dumps({
+            "using": using,
+            "b2": executable_identity(self.executable),
+            "env": dict((v, os.environ.get(v)) for v in TOOLSET_ENVIRONMENT),
+        }, sort_keys=True).encode("utf-8")).hexdigest()
+        path = os.path.join(self.toolset_cache, fingerprint + ".jam")
+
+        try:
+            with open(path) as file:
+                header = file.readline()
+            tools_used = json.loads(header[len(TOOLSET_CACHE_HEADER):])
+            if all(executable_identity(t) == i for (t, i) in tools_used):
+                return path
+        except (IOError, OSError, ValueError):
+            pass
+
+        content = self._probe_toolsets(using)
+        if content is None:
+            return None
+        mkdir(self.toolset_cache)
+        replace_if_changed(path, content)
+        return path
+
+    def _probe_toolsets(self, using):
+        directory = tempfile.mkdtemp()
+        try:
+            tools.save(os.path.join(directory, "jamroot.jam"), "")
+            tools.save(
+                os.path.join(directory, "probe.jam"),
+                "import feature ;\n"
+                "local all-toolsets = [ feature.values toolset ] ;\n"
+                + SHELL_OVERRIDE.format(
+                    "local result = [ b2-helper.SHELL $(command) : $(2) ] ;\n"
+                    "    ECHO \"@b2-helper-shell\" $(key) ;\n"
+                    "    ECHO \"@b2-helper-command\" $(command) ;\n"
+                    "    for local r in $(result)\n"
+                    "    {\n"
+                    "        ECHO \"@b2-helper-item\" ;\n"
+                    "        ECHO $(r) ;\n"
+                    "    }\n"
+                    "    ECHO \"@b2-helper-end\" ;"
+                )
+                + using
+                + SHELL_RESTORE
+            )
+            with tools.environment_append(self._environment()):
+                process = subprocess.Popen(
+                    [self.executable, "--project-config=probe.jam", "-n"],
+                    cwd=directory,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.STDOUT,
+                )
+                output = process.communicate()[0]
+        except OSError:
+            return None
+        finally:
+            tools.rmdir(directory)
+
+        if process.returncode != 0:
+            self.conanfile.output.warn(
+                "Toolset detection failed, results are not cached"
+            )
+            return None
 
-            for include in self.include:
-                include = path_escaped(include)
-                file.write("include \"%s\" ;\n" % include)
+        entries, tools_used = parse_shell_records(
+            output.decode("utf-8", "surrogateescape")
+        )
+        lines = [TOOLSET_CACHE_HEADER + json.dumps([
+            (t, executable_identity(t)) for t in tools_used
+        ]) + "\n"]
+        for key, items in entries:
+            lines.append(".b2-helper-shell.%s = %s ;\n" % (
+                key,
+                " ".join(jam_string(i) for i in items),
+            ))
+        return "".join(lines)
+
+    def _render_launchers(self):
+        # the launcher recognizes compilations only in commands of /bin/sh
+        unsupported = [
+            option for option in ("action_cache", "compile_commands")
+            if getattr(self, option)
+        ]
+        if (
+            unsupported
+            and tools.os_info.is_windows
+            and not self._warned_shell
+        ):
+            self._warned_shell = True
+            self.conanfile.output.warn(
+                "%s have no effect, compilations run by cmd.exe are not"
+                " recognized" % ", ".join(unsupported)
+            )
 
-            file.write("project : requirements\n")
-            for k, v in self.properties.flattened():
-                file.write("  <%s>%s\n" % (k, path_escaped(v)))
-            file.write("  ;\n")
+        # actions of initialized toolsets are run via the launcher script
+        lines = ["import modules ;\n"]
+        for rule, args in self._launched_rules().items():
+            shell = launcher_command(*(args + ["--"] + default_shell()))
+            lines.append((
+                "for local m in {0}\n"
+                "{{\n"
+                "  if $(m) in [ modules.peek modules : .loaded ]\n"
+                "  {{\n"
+                "    modules.call-in $(m) :"
+                " toolset.flags $(m).{1} JAMSHELL : {2} ;\n"
+                "  }}\n"
+                "}}\n"
+            ).format(
+                " ".join(LAUNCHED_RULES[rule]), rule, jam_list(shell)
+            ))
+        return "".join(lines)
+
+    def _launched_rules(self):
+        rules = collections.OrderedDict()
+
+        if self.link_jobs:
+            for rule in ("link", "link.dll"):
+                rules.setdefault(rule, []).extend([
+                    "--slots", str(self.link_jobs), "--locks", self.link_locks,
+                ])
+
+        if self.action_cache:
+            for rule in ("compile.c", "compile.c++"):
+                rules.setdefault(rule, []).extend([
+                    "--cache", self.action_cache,
+                    "--cache-log", self._action_cache_log,
+                ])
+
+        if self.install_manifest:
+            rules.setdefault("copy", []).append("--recordable-copy")
+
+        if self.incremental_install:
+            rules.setdefault("copy", []).append("--skip-unchanged")
+
+        if self.install_mode not in launcher_module().INSTALL_MODES:
+            raise ConanException(
+                "Unknown install mode %s" % self.install_mode
+            )
+        if self.install_mode != "copy":
+            rules.setdefault("copy", []).extend([
+                "--install-mode", self.install_mode,
+            ])
+
+        if self.compile_commands:
+            for rule in ("compile.c", "compile.c++"):
+                rules.setdefault(rule, []).extend([
+                    "--compile-db", self._compile_commands_log,
+                ])
+
+        if self.trace:
+            for rule in LAUNCHED_RULES:
+                rules.setdefault(rule, []).extend([
+                    "--trace", self._trace_log, "--trace-name", rule,
+                ])
+
+        return rules
+
+    def _varying_properties(self):
+        result = set()
+        for variant in self.variants:
+            result.update(variant)
+        return result
+
+    def _requirements(self):
+        varying = self._varying_properties()
+        return (
+            (k, v) for (k, v) in self.properties.flattened()
+            if k not in varying
+        )
 
+    def _conditional_requirements(self):
+        # variants can't override conditional properties, so they apply to
+        # all of them
+        return unique(itertools.chain.from_iterable(
+            p.conditional_properties()
+            for p in [self.properties] + self.variants
+        ))
+
+    def _build_request(self):
+        # b2 combines non-conflicting elements of a build request, so every
+        # element specifies all varying properties to keep them separate
+        varying = self._varying_properties()
+        for variant in self.variants:
+            properties = itertools.chain(
+                variant.flattened(),
+                (
+                    (k, v) for (k, v) in self.properties.flattened()
+                    if k in varying and k not in variant
+                ),
+            )
+            yield "/".join("%s=%s" % (k, v) for (k, v) in properties)
 
     def build(self, *targets):
         """
@@ -789,52 +1336,2055 @@ class B2(object):
         """
         if not (targets or self.conanfile.should_build):
             return
-        self._build(targets)
+        if self.install_manifest and self.conanfile.should_install:
+            self._build_recording_install(targets)
+        else:
+            self._build(targets)
+
+    def build_all(self, *targets):
+        """
+        Run Boost.Build once to build targets `targets` (or default targets),
+        `test` and `install`, so that the project is parsed and scanned only
+        once. The run is recorded in the build folder and subsequent calls to
+        `self.test()` and `self.install()` with the same configuration and
+        options (other than the number of jobs and debug level) don't run
+        Boost.Build again.
+
+        `test` is skipped if environment variable `CONAN_RUN_TESTS` is defined
+        and is falsey, `install` is skipped if `conanfile.should_install` is
+        falsey.
+
+        :param targets: target references that will be built.
+        """
+
+        targets = list(targets)
+        if not targets and self.conanfile.should_build:
+            targets.append(".")
+        if tools.get_env("CONAN_RUN_TESTS", True):
+            targets.append("test")
+        if self.conanfile.should_install:
+            targets.append("install")
+        if not targets:
+            return
+
+        _, graph = self._build(targets)
+        if "install" in targets:
+            self._update_installed(graph)
+        replace_if_changed(
+            self._run_record,
+            json.dumps(dict(self._run_state(), targets=targets), indent=2),
+        )
 
     def install(self, force=True):
         """
         Run Boost.Build to build target `install`. Doesn't do anything if
-        `conanfile.should_install` is falsey.
+        `conanfile.should_install` is falsey or if the target was already built
+        by `self.build_all()`.
 
         :param force: build anyway.
         """
 
         if force or self.conanfile.should_install:
-            self._build(["install"])
+            if not self._replay_install():
+                self._update_installed(self._build_unless_recorded("install"))
 
     def test(self, force=False):
         """
         Run Boost.Build to build target `test`. Doesn't do anything if
-        if environment variable `CONAN_RUN_TESTS` is defined and is falsey.
+        if environment variable `CONAN_RUN_TESTS` is defined and is falsey or
+        if the target was already built by `self.build_all()`.
 
         :param force: test anyway.
         """
 
         if force or tools.get_env("CONAN_RUN_TESTS", True):
-            self._build(["test"])
+            self._build_unless_recorded("test")
 
-    def _build(self, targets):
-        special_options = (
-            "--project-config=" + self.project_config,
-            "--build-dir=" + self.build_folder,
+    def watch(self, *targets, builds=None, debounce=0.2, polling=False):
+        """
+        Run Boost.Build to build targets `targets` (or default targets), then
+        rebuild them every time files in the source folder change, until
+        interrupted. Bursts of changes cause one rebuild, and a build in
+        progress is cancelled and started again when files change. Requires
+        `self.configure()` to have been called before with the current
+        configuration, the configuration file is not recreated. Build and
+        package folders must not contain the source folder.
+
+        :param targets: target references that will be built.
+        :param builds: stop after this many completed builds.
+        :param debounce: seconds without changes that end a burst of changes.
+        :param polling: poll modification times even if inotify is available.
+        """
+
+        # outputs written into the watched tree would trigger rebuilds
+        # forever, and where Boost.Build puts them depends on the project
+        source = os.path.normcase(os.path.abspath(self.source_folder))
+        for name in ("build", "package"):
+            folder = getattr(self, name + "_folder")
+            folder = os.path.normcase(os.path.abspath(folder))
+            if source == folder or source.startswith(
+                os.path.join(folder, "")
+            ):
+                raise ConanException(
+                    "Can't watch source folder %s, because it is inside %s"
+                    " folder %s, use a separate %s folder"
+                    % (self.source_folder, name, folder, name)
+                )
+
+        excluded = (
+            self.build_folder,
+            self.package_folder,
+            self.conanfile.install_folder,
+        )
+        watcher = SourceWatcher(self.source_folder, excluded, polling)
+        completed = 0
+        try:
+            while builds is None or completed < builds:
+                result, changed = self._watched_build(
+                    targets, watcher, debounce
+                )
+                if changed is None:
+                    completed += 1
+                    if result == 0:
+                        self.conanfile.output.success("Build succeeded")
+                    else:
+                        self.conanfile.output.error("Build failed")
+                    if builds is not None and completed >= builds:
+                        break
+                    self.conanfile.output.info("Watching for changes")
+                    changed = watcher.wait(debounce=debounce)
+                else:
+                    self.conanfile.output.warn("Build cancelled")
+                self.conanfile.output.info("Changed: %s" % ", ".join(
+                    os.path.relpath(c, self.source_folder)
+                    for c in sorted(changed)[:5]
+                ) + (", ..." if len(changed) > 5 else ""))
+        except KeyboardInterrupt:
+            self.conanfile.output.info("Stopped watching")
+        finally:
+            watcher.close()
+
+    def _watched_build(self, targets, watcher, debounce):
+        # the build runs in its own process group, so that it can be
+        # interrupted together with the commands it runs
+        if tools.os_info.is_windows:
+            group = dict(creationflags=subprocess.CREATE_NEW_PROCESS_GROUP)
+        else:
+            group = dict(start_new_session=True)
+
+        env = dict(os.environ, **self._environment())
+        process = subprocess.Popen(
+            self._command_line(targets), cwd=self.source_folder, env=env,
+            **group
         )
+        try:
+            while process.poll() is None:
+                changed = watcher.changes(timeout=0.1)
+                if changed:
+                    interrupt(process)
+                    return None, changed | watcher.wait(debounce, debounce)
+            return process.returncode, None
+        except:
+            interrupt(process)
+            raise
+
+    @property
+    def _run_record(self):
+        return os.path.join(self.build_folder, "b2-helper-run.json")
+
+    def _run_state(self):
+        return {
+            "config": file_digest(self.project_config),
+            "options": [
+                self.options._stringify(k, v)
+                for k, v in self.options.items()
+                if k not in VOLATILE_OPTIONS
+            ],
+            "request": list(self._build_request()),
+        }
 
-        args = itertools.chain(
-            [self.executable],
+    @property
+    def _install_manifest_file(self):
+        return os.path.join(self.build_folder, "b2-helper-install.json")
+
+    def _build_recording_install(self, targets):
+        # copy actions of target install are recorded instead of performed
+        log = os.path.join(self.build_folder, "b2-helper-install.log")
+        manifest_file = self._install_manifest_file
+        targets = list(targets or ["."]) + ["install"]
+
+        # a skipped run doesn't record anything, so it can only be skipped if
+        # the manifest of the previous run is there, and the stamp is only
+        # saved once the manifest is written
+        ran, graph = self._build(
             targets,
-            special_options,
-            self.options.strings(),
+            {"B2_HELPER_COPY_RECORD": log},
+            invalidated=(log, manifest_file),
+            check_stamp=os.path.isfile(manifest_file),
+            save_stamp=False,
         )
+        if not ran:
+            return
+
+        copies = []
+        try:
+            with open(log) as file:
+                for line in file:
+                    copy = json.loads(line)
+                    stat = os.stat(copy["source"])
+                    copy.update(size=stat.st_size, mtime=stat.st_mtime_ns)
+                    copies.append(copy)
+        except (IOError, OSError):
+            pass
 
+        manifest = dict(self._run_state(), copies=copies)
+        if graph is not None and self.incremental_install:
+            # all installed files, not only the ones that need copying
+            manifest["files"] = sorted(graph.files)
+        replace_if_changed(manifest_file, json.dumps(manifest, indent=2))
+        self._save_stamp(targets)
+
+    def _replay_install(self):
+        try:
+            with open(self._install_manifest_file) as file:
+                manifest = json.load(file)
+        except (IOError, OSError, ValueError):
+            return False
+
+        def unchanged(copy):
+            try:
+                stat = os.stat(copy["source"])
+            except OSError:
+                return False
+            return (stat.st_size, stat.st_mtime_ns) == (
+                copy["size"], copy["mtime"]
+            )
+
+        if not (
+            all(manifest.get(k) == v for k, v in self._run_state().items())
+            and all(unchanged(c) for c in manifest["copies"])
+        ):
+            self.conanfile.output.info(
+                "Install manifest is outdated, running Boost.Build"
+            )
+            return False
+
+        copies = manifest["copies"]
+        install_file = launcher_module().install_file
+        with concurrent.futures.ThreadPoolExecutor(tools.cpu_count()) as pool:
+            modes = collections.Counter(pool.map(
+                lambda c: install_file(
+                    c["source"],
+                    c["destination"],
+                    self.install_mode,
+                    skip_unchanged=self.incremental_install,
+                ),
+                copies,
+            ))
+        self.conanfile.output.info(
+            "Installed %s files from install manifest (%s)" % (
+                len(copies),
+                ", ".join("%s: %s" % m for m in sorted(modes.items())),
+            )
+        )
+        if manifest.get("files") is not None:
+            self._update_installed_files(manifest["files"])
+        return True
+
+    @property
+    def _installed_file(self):
+        return os.path.join(self.build_folder, "b2-helper-installed.json")
+
+    def _update_installed(self, graph):
+        if graph is not None and self.incremental_install:
+            self._update_installed_files(graph.files)
+
+    def _update_installed_files(self, files):
+        # files installed previously, but not this time, are removed; paths
+        # are relative to package folder, so that it can be moved
+        try:
+            with open(self._installed_file) as file:
+                previous = json.load(file)
+        except (IOError, OSError, ValueError):
+            previous = {}
+
+        installed = {}
+        added, updated = [], []
+        for path in sorted(files):
+            name = os.path.relpath(path, self.package_folder)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entry = previous.pop(name, None)
+            state = dict(size=stat.st_size, mtime=stat.st_mtime_ns)
+            if entry is None:
+                added.append(name)
+                state["digest"] = file_digest(path)
+            elif all(entry[k] == v for k, v in state.items()):
+                state["digest"] = entry["digest"]
+            else:
+                state["digest"] = file_digest(path)
+                if state["digest"] != entry["digest"]:
+                    updated.append(name)
+            installed[name] = state
+
+        removed = []
+        for name in sorted(previous):
+            path = os.path.join(self.package_folder, name)
+            if os.path.isfile(path):
+                os.remove(path)
+                removed.append(name)
+
+        replace_if_changed(
+            self._installed_file,
+            json.dumps(installed, indent=2, sort_keys=True),
+        )
+
+        self.install_report = dict(
+            added=added, updated=updated, removed=removed,
+        )
+        output = self.conanfile.output
+        output.info("Installed files: %s added, %s updated, %s removed" % (
+            len(added), len(updated), len(removed)
+        ))
+        for kind, paths in self.install_report.items():
+            for name in paths[:50]:
+                output.info("  %s %s" % (kind, name))
+            if len(paths) > 50:
+                output.info("  ... and %s more %s" % (len(paths) - 50, kind))
+
+    def _build_unless_recorded(self, target):
+        try:
+            with open(self._run_record) as file:
+                record = json.load(file)
+        except (IOError, OSError, ValueError):
+            record = {}
+
+        if (
+            target in record.get("targets", ())
+            and all(record.get(k) == v for k, v in self._run_state().items())
+        ):
+            self.conanfile.output.info(
+                "Target %s was already built by the previous run" % target
+            )
+            return
+
+        return self._build([target])[1]
+
+    def _build(
+        self,
+        targets,
+        environment=None,
+        invalidated=(),
+        check_stamp=True,
+        save_stamp=True,
+    ):
+        """
+        Runs Boost.Build unless nothing changed since the last run (if
+        `check_stamp` is truthy). Files `invalidated` are removed before
+        Boost.Build runs. Returns a pair of a flag that tells whether
+        Boost.Build was run and the collected dependency graph (or None).
+        """
+
+        stamp = self._stamp(targets)
+        if (
+            check_stamp
+            and stamp is not None
+            and stamp == self._stamps().get(stamp_key(targets))
+        ):
+            self.conanfile.output.info(
+                "Nothing changed since the last run, skipping Boost.Build"
+            )
+            return False, None
+
+        # any run can invalidate what a previous combined run had built
+        for path in (self._run_record,) + tuple(invalidated):
+            if os.path.exists(path):
+                os.remove(path)
+
+        debug = []
+        if "jam" in self._profiles():
+            debug.append("-d+10")
+        tracked = self.incremental_install and "install" in targets
+        if self.explain or tracked:
+            debug.append("-d+12")
+        args = self._command_line(targets, debug)
+
+        if self.action_cache and os.path.exists(self._action_cache_log):
+            os.remove(self._action_cache_log)
+        if self.trace and os.path.exists(self._trace_log):
+            os.remove(self._trace_log)
+        compile_log = self._compile_commands_log
+        if self.compile_commands and os.path.exists(compile_log):
+            os.remove(compile_log)
+
+        graph = None
+        if self.explain or tracked:
+            graph = DependencyGraph(
+                self.package_folder if tracked else None, self.explain,
+            )
+        monitor = OutputMonitor(self.conanfile.output, graph)
         with tools.chdir(self.source_folder):
-            self.conanfile.run(join_arguments(args))
+            with tools.environment_append(
+                dict(self._environment(), **(environment or {}))
+            ):
+                stats = self._compiler_cache_stats()
+                usage = resource_usage()
+                memory = MemorySampler()
+                try:
+                    # Conan wraps string commands with environment
+                    # launchers and runs them in bash on Windows if needed
+                    with memory:
+                        self.conanfile.run(join_command(args), output=monitor)
+                finally:
+                    self.summary = monitor.finish()
+                    self._write_metrics(
+                        targets, usage, self.summary, memory.peak
+                    )
+                    if self.trace:
+                        self._write_trace()
+                    if self.compile_commands:
+                        self._write_compile_commands()
+                    if self._profiles():
+                        self._write_profile(monitor.rules)
+                    if self.explain:
+                        self._write_explanation(targets, graph)
+                self._report_compiler_cache(stats)
+
+        if self.action_cache:
+            self._report_action_cache()
+            trim_cache(self.action_cache, parse_size(self.action_cache_size))
+
+        if save_stamp:
+            self._save_stamp(targets)
+
+        return True, graph
+
+    def _save_stamp(self, targets):
+        # the trees are digested after the run, so that the stamp includes
+        # the run's outputs
+        stamp = self._stamp(targets)
+        if stamp is None:
+            return
+        stamps = self._stamps()
+        stamps[stamp_key(targets)] = stamp
+        replace_if_changed(self._stamps_file, json.dumps(stamps, indent=2))
+
+    def _command_line(self, targets, extra_options=()):
+        request = [
+            r for r in itertools.chain(targets, self._build_request()) if r
+        ]
+        special_options = [
+            "--project-config=" + self.project_config,
+            "--build-dir=" + self.build_folder,
+        ] + list(extra_options)
+
+        options = special_options + list(self.options.arguments())
+        args = [self.executable] + request + options
+        if command_length(args) > self.command_line_limit:
+            request_file = os.path.join(
+                self.build_folder, "b2-helper-request.jam"
+            )
+            replace_if_changed(request_file, render_request(request))
+            args = [
+                self.executable, "-sB2_HELPER_REQUEST=" + request_file,
+            ] + options
+        return args
+
+    @property
+    def _stamps_file(self):
+        return os.path.join(self.build_folder, "b2-helper-stamps.json")
+
+    def _stamps(self):
+        try:
+            with open(self._stamps_file) as file:
+                return json.load(file)
+        except (IOError, OSError, ValueError):
+            return {}
+
+    def _stamp(self, targets):
+        if not self.up_to_date_check:
+            return None
+
+        build_info = os.path.join(
+            self.conanfile.install_folder, "conanbuildinfo.jam"
+        )
+        excluded = [
+            f for f in (self.action_cache, self.link_locks) if f
+        ]
+        state = dict(
+            self._run_state(),
+            executable=self.executable,
+            targets=list(targets),
+            build_info=file_digest(build_info),
+            # output folders are often inside the source folder, their
+            # contents are only statted, as part of outputs
+            sources=tree_digest(
+                [self.source_folder],
+                excluded=excluded + [
+                    self.build_folder,
+                    self.package_folder,
+                    self.conanfile.install_folder,
+                ],
+                full=self.up_to_date_check == "hash",
+            ),
+            outputs=tree_digest(
+                [self.build_folder, self.package_folder],
+                excluded=excluded + [self.source_folder],
+            ),
+        )
+        return hashlib.sha256(
+            json.dumps(state, sort_keys=True).encode("utf-8")
+        ).hexdigest()
+
+    def _profiles(self):
+        profiles = set(p.strip() for p in self.profile.split(",") if p)
+        if "all" in profiles:
+            profiles.update(("jam", "python"))
+        return profiles
+
+    @contextlib.contextmanager
+    def _profiling(self):
+        if "python" not in self._profiles():
+            yield
+            return
 
+        if self._profiler is None:
+            self._profiler = cProfile.Profile()
+        self._profiler.enable()
+        try:
+            yield
+        finally:
+            self._profiler.disable()
+
+    @property
+    def profile_file(self):
+        """
+        Path to the profiling report.
+        """
+
+        return os.path.join(self.build_folder, "b2-helper-profile.txt")
+
+    def _write_profile(self, rules, limit=30):
+        lines = []
+        if "jam" in self._profiles():
+            rules = sorted(rules, key=lambda r: r["net"], reverse=True)
+            lines.append(
+                "Boost.Build rules by own time (%s of %s)\n\n"
+                % (min(limit, len(rules)), len(rules))
+            )
+            lines.append("%10s %12s %12s %12s  %s\n" % (
+                "count", "gross", "net", "each", "name",
+            ))
+            for rule in rules[:limit]:
+                lines.append("%(count)10d %(gross)12.6f %(net)12.6f"
+                             " %(each)12.8f  %(name)s\n" % rule)
+
+        if self._profiler is not None:
+            stream = six.StringIO()
+            stats = pstats.Stats(self._profiler, stream=stream)
+            stats.sort_stats("cumulative").print_stats(limit)
+            if lines:
+                lines.append("\n")
+            lines.append("Python functions by cumulative time\n")
+            lines.append(stream.getvalue())
+
+        replace_if_changed(self.profile_file, "".join(lines))
+        self.conanfile.output.info(
+            "Profile written to %s" % self.profile_file
+        )
+
+    @property
+    def compile_commands_file(self):
+        """
+        Path to the compilation database.
+        """
+
+        return os.path.join(self.build_folder, "compile_commands.json")
 
-def join_arguments(args):
-    return " ".join(filter(None, args))
+    @property
+    def _compile_commands_log(self):
+        return os.path.join(self.build_folder, "b2-helper-compile.log")
+
+    def _write_compile_commands(self):
+        # entries of compilations that did not run this time are kept
+        try:
+            with open(self.compile_commands_file) as file:
+                entries = json.load(file)
+        except (IOError, OSError, ValueError):
+            entries = []
+
+        try:
+            with open(self._compile_commands_log) as file:
+                for line in file:
+                    try:
+                        entries.append(json.loads(line))
+                    except ValueError:
+                        pass
+        except (IOError, OSError):
+            pass
+
+        database = collections.OrderedDict()
+        for entry in entries:
+            source = os.path.join(entry["directory"], entry["file"])
+            if os.path.exists(source):
+                output = os.path.join(entry["directory"], entry["output"])
+                database[os.path.normpath(output)] = entry
+
+        replace_if_changed(
+            self.compile_commands_file,
+            json.dumps(list(database.values()), indent=2),
+        )
+
+    def explain_file(self, phase="build"):
+        """
+        Path to the report on reasons for rebuilding targets in phase `phase`
+        (`"build"`, `"install"` or `"test"`).
+        """
+
+        return os.path.join(
+            self.build_folder, "b2-helper-explain-%s.txt" % phase
+        )
+
+    def _write_explanation(self, targets, graph, limit=10):
+        rebuilt, inputs = graph.explain()
+
+        lines = ["%s targets are rebuilt\n" % len(rebuilt)]
+        if inputs:
+            lines.append("\nChanged inputs by the number of affected targets\n")
+            for name, count in inputs:
+                lines.append("%8s  %s\n" % (count, name))
+        if rebuilt:
+            lines.append("\nRebuilt targets\n")
+            for name, reason, causes in rebuilt:
+                lines.append("  %s: %s\n" % (name, reason))
+                for cause in causes:
+                    lines.append("    %s\n" % cause)
+
+        path = self.explain_file(build_phase(targets))
+        replace_if_changed(path, "".join(lines))
+
+        output = self.conanfile.output
+        output.info("%s targets are rebuilt, see %s" % (len(rebuilt), path))
+        for name, count in inputs[:limit]:
+            output.info("  %s affects %s targets" % (name, count))
+
+    @property
+    def metrics_file(self):
+        """
+        Path to the file with resource usage of Boost.Build runs.
+        """
+
+        return os.path.join(self.build_folder, "b2-helper-metrics.json")
+
+    def _write_metrics(self, targets, before, summary, sampled_rss=None):
+        after = resource_usage()
+        metrics = dict(
+            (k, after[k] - before[k]) for k in after if k != "peak_rss"
+        )
+        metrics.update(
+            targets=list(targets),
+            wall_time=summary["total"],
+            finished=time.time(),
+        )
+
+        # the peak of finished children covers the whole lifetime of the
+        # process, it belongs to this run only if the run raised it
+        peaks = [sampled_rss] if sampled_rss else []
+        if after.get("peak_rss", 0) > before.get("peak_rss", 0):
+            peaks.append(after["peak_rss"])
+        if peaks:
+            metrics["peak_rss"] = max(peaks)
+
+        try:
+            with open(self.metrics_file) as file:
+                phases = json.load(file)
+        except (IOError, OSError, ValueError):
+            phases = {}
+        phases[build_phase(targets)] = metrics
+        replace_if_changed(
+            self.metrics_file, json.dumps(phases, indent=2, sort_keys=True)
+        )
+
+    @property
+    def trace_file(self):
+        """
+        Path to the file with action timings in Chrome trace format. It is
+        located next to project configuration file.
+        """
+
+        return os.path.join(
+            os.path.dirname(self.project_config), "b2-helper-trace.json"
+        )
+
+    @property
+    def _trace_log(self):
+        return os.path.join(self.build_folder, "b2-helper-trace.log")
+
+    def _write_trace(self):
+        records = []
+        try:
+            with open(self._trace_log) as file:
+                for line in file:
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        pass
+        except (IOError, OSError):
+            pass
+        # keep timings of the last run that did run some actions
+        if not records:
+            return
+
+        replace_if_changed(
+            self.trace_file, json.dumps(chrome_trace(records), indent=1)
+        )
+        self.conanfile.output.info("Action timings written to %s" % (
+            self.trace_file,
+        ))
+
+    @property
+    def _action_cache_log(self):
+        return os.path.join(self.build_folder, "b2-helper-cache.log")
+
+    def _report_action_cache(self):
+        try:
+            with open(self._action_cache_log) as file:
+                results = file.read().split()
+        except (IOError, OSError):
+            return
+        self.conanfile.output.info(
+            "Action cache: %s hits, %s misses"
+            % (results.count("hit"), results.count("miss"))
+        )
+
+    def _environment(self):
+        env = self._compiler_cache_env()
+        if self.properties.reproducible:
+            # makes Apple's ar and libtool omit timestamps
+            env["ZERO_AR_DATE"] = "1"
+        return env
+
+    def _compiler_cache_env(self):
+        if not self.compiler_cache:
+            return {}
+
+        if self._is_sccache():
+            dir_var, size_var = "SCCACHE_DIR", "SCCACHE_CACHE_SIZE"
+        else:
+            dir_var, size_var = "CCACHE_DIR", "CCACHE_MAXSIZE"
+
+        env = {}
+        if self.compiler_cache_dir:
+            env[dir_var] = self.compiler_cache_dir
+        if self.compiler_cache_size:
+            env[size_var] = str(self.compiler_cache_size)
+        return env
+
+    def _is_sccache(self):
+        return os.path.basename(self.compiler_cache).startswith("sccache")
+
+    def _compiler_cache_stats(self):
+        if not self.compiler_cache:
+            return None
+
+        try:
+            if self._is_sccache():
+                output = subprocess.check_output(
+                    [self.compiler_cache, "--show-stats", "--stats-format=json"]
+                )
+                stats = json.loads(output.decode("utf-8"))["stats"]
+                return {
+                    "hits": sum(stats["cache_hits"]["counts"].values()),
+                    "misses": sum(stats["cache_misses"]["counts"].values()),
+                }
+
+            output = subprocess.check_output(
+                [self.compiler_cache, "--print-stats"]
+            )
+            stats = dict(
+                line.split("\t", 1)
+                for line in output.decode("utf-8").splitlines()
+                if "\t" in line
+            )
+            return {
+                "hits": (
+                    int(stats.get("direct_cache_hit", 0))
+                    + int(stats.get("preprocessed_cache_hit", 0))
+                ),
+                "misses": int(stats.get("cache_miss", 0)),
+            }
+        except (OSError, subprocess.CalledProcessError, ValueError, KeyError):
+            return None
+
+    def _report_compiler_cache(self, before):
+        after = self._compiler_cache_stats()
+        if before is None or after is None:
+            return
+
+        hits = after["hits"] - before["hits"]
+        misses = after["misses"] - before["misses"]
+        total = hits + misses
+        self.conanfile.output.info(
+            "%s: %s hits, %s misses (%.0f%% hit rate)" % (
+                os.path.basename(self.compiler_cache),
+                hits,
+                misses,
+                100.0 * hits / total if total else 0,
+            )
+        )
+
+
+class OutputMonitor(object):
+    """
+    Stream that receives Boost.Build output, passes it through to the stream
+    of `output` and tracks progress of the build, which is reported to
+    `output`. Profiler output is collected into `rules` and dependency graph
+    output is passed to `graph` instead. Only the current line is kept in
+    memory, so output of any size can be processed.
+    """
+
+    progress_interval = 5
+
+    _action = re.compile(r"^[A-Za-z_][\w-]*(?:\.[\w+-]+)+ \S")
+    _marker = re.compile(
+        r"^\.\.\.(found|updating|updated|failed updating|skipped)"
+        r" (\d+) targets?\.\.\.$"
+    )
+    _profile_row = re.compile(
+        r"^\s*(\d+)\s+([\d.]+)\s+([\d.]+)\s+([\d.]+)"
+        r"\s+[\d.]+\s+[\d.]+\s+(\S.*)$"
+    )
+
+    def __init__(self, output, graph=None):
+        self._output = output
+        self._graph = graph
+        # the same stream is used by Conan for output of commands
+        self._passthrough = getattr(output, "_stream", None) or sys.stdout
+        self._line = ""
+        self._started = time.time()
+        self._found = None
+        self._updating = None
+        self._reported = self._started
+        self._profile = False
+        self.rules = []
+        self.counts = collections.OrderedDict(
+            (k, 0) for k in ("found", "updating", "updated", "failed", "skipped")
+        )
+        self.actions = 0
+        self.failed_actions = []
+
+    def write(self, data, *args, **kw):
+        lines = (self._line + data).split("\n")
+        self._line = lines.pop()
+        for line in lines:
+            if not self._parse(line.rstrip("\r")):
+                self._passthrough.write(line + "\n")
+        self._passthrough.flush()
+
+    def flush(self):
+        pass
+
+    def _parse(self, line):
+        if self._graph is not None and self._graph.parse(line):
+            return True
+
+        # profiler output is collected instead of passed through
+        if line.startswith(" --count--"):
+            self._profile = True
+            return True
+        if self._profile:
+            row = self._profile_row.match(line)
+            if row:
+                self.rules.append(dict(
+                    count=int(row.group(1)),
+                    gross=float(row.group(2)),
+                    net=float(row.group(3)),
+                    each=float(row.group(4)),
+                    name=row.group(5),
+                ))
+                return True
+            elif " table: " in line:
+                return True
+            self._profile = False
+
+        marker = self._marker.match(line)
+        if marker:
+            kind = marker.group(1).split()[0]
+            self.counts[kind] = int(marker.group(2))
+            if kind == "found":
+                self._found = time.time()
+            elif kind == "updating":
+                self._updating = time.time()
+                self._reported = self._updating
+        elif line.startswith("...failed "):
+            if len(self.failed_actions) < 20:
+                self.failed_actions.append(line[len("...failed "):-3])
+        elif self._updating is not None and self._action.match(line):
+            self.actions += 1
+            self._report_progress()
+
+    def _report_progress(self):
+        now = time.time()
+        if now - self._reported < self.progress_interval:
+            return
+        self._reported = now
+
+        total = max(self.counts["updating"], self.actions)
+        done = self.actions
+        eta = (now - self._updating) * (total - done) / done
+        self._output.info(
+            "Progress: %s/%s targets (%.0f%%), ETA %s" % (
+                done, total, 100.0 * done / total, format_duration(eta),
+            )
+        )
+
+    def finish(self):
+        """
+        Reports and returns the summary of the build.
+        """
+
+        if self._line:
+            if not self._parse(self._line):
+                self._passthrough.write(self._line)
+            self._line = ""
+
+        finished = time.time()
+        found = self._found or finished
+        updating = self._updating or finished
+        summary = dict(
+            self.counts,
+            actions=self.actions,
+            failed_actions=self.failed_actions,
+            parsing=found - self._started,
+            scanning=updating - found,
+            running=finished - updating,
+            total=finished - self._started,
+        )
+
+        self._output.info((
+            "Boost.Build took {total}: {parsing} parsing, {scanning} scanning,"
+            " {running} running actions"
+        ).format(**dict(
+            (k, format_duration(summary[k]))
+            for k in ("total", "parsing", "scanning", "running")
+        )))
+        self._output.info(
+            "Targets: {updated} updated, {failed} failed, {skipped} skipped"
+            .format(**summary)
+        )
+        return summary
+
+
+class DependencyGraph(object):
+    """
+    Collects the dependency graph printed by Boost.Build with option -d+12
+    and explains why targets are rebuilt. Only dependencies on targets that
+    are not up to date and on header scanning nodes are kept. If the graph is
+    only needed for the list of installed files, nothing else is kept.
+    """
+
+    _node = re.compile(r"^(->)?\s*\d+ Name: (.*)$")
+    _location = re.compile(r"^\s+Loc: (.*)$")
+    _dependency = re.compile(
+        r"^\s+: Depends on (.*) \((\w+)\)( \(max time\))?$"
+    )
+    _flag = re.compile(r"^\s+: (\S.*)$")
+
+    # fates of targets that are not the result of changes of their
+    # dependencies
+    _changed = {
+        "newer": "newer than its dependents",
+        "touched": "touched",
+        "missing": "missing",
+        "rebuild": "rebuild forced",
+        "nofind": "can't be found",
+    }
+    _reasons = dict(_changed, old="outdated", update="dependencies updated")
+
+    def __init__(self, prefix=None, explain=True):
+        """
+        :param prefix: directory, locations of all targets inside of which
+                       are collected into `self.files`.
+        :param explain: collect what is needed for `self.explain()`.
+        """
+
+        self._current = None
+        self._prefix = prefix and os.path.join(os.path.abspath(prefix), "")
+        self._explain = explain
+        self.files = set()
+        self.updating = []
+        self._updating = set()
+        self.locations = {}
+        self.dependencies = {}
+        self.fates = {}
+        self.no_update = set()
+
+    def parse(self, line):
+        """
+        Processes one line of output. Returns True if the line is a part of
+        the dependency graph.
+        """
+
+        if not self._explain:
+            return self._parse_files(line)
+
+        node = self._node.match(line)
+        if node:
+            self._current = node.group(2)
+            if node.group(1):
+                self.updating.append(self._current)
+                self._updating.add(self._current)
+            return True
+        if self._current is None:
+            return False
+
+        dependency = self._dependency.match(line)
+        if dependency:
+            name, fate = dependency.group(1, 2)
+            # stable internal nodes hold dependencies on included headers
+            if fate != "stable" or name.endswith(" (internal node)"):
+                self.fates[name] = fate
+                self.dependencies.setdefault(self._current, []).append(name)
+            return True
+
+        location = self._location.match(line)
+        if location:
+            path = location.group(1)
+            if self._current in self._updating or self._current in self.fates:
+                self.locations[self._current] = path
+            if self._prefix and os.path.abspath(path).startswith(self._prefix):
+                self.files.add(os.path.abspath(path))
+            return True
+
+        flag = self._flag.match(line)
+        if flag:
+            if flag.group(1).strip() == "NOUPDATE":
+                self.no_update.add(self._current)
+            return True
+
+        self._current = None
+        return False
+
+    def _parse_files(self, line):
+        # output of large builds is mostly the graph, so lines are only
+        # classified and locations are the only thing kept
+        if " Name: " in line and self._node.match(line):
+            self._current = True
+            return True
+        if self._current is None:
+            return False
+
+        text = line.lstrip()
+        if text.startswith("Loc: "):
+            path = os.path.abspath(text[5:])
+            if self._prefix and path.startswith(self._prefix):
+                self.files.add(path)
+            return True
+        if text.startswith(": "):
+            return True
+
+        self._current = None
+        return False
+
+    def explain(self):
+        """
+        Returns a list of rebuilt files with the reason and the changed inputs
+        that caused the rebuild, and a list of changed inputs with the number
+        of rebuilt files they affect, starting with the largest one.
+        """
+
+        memo = {}
+
+        def causes(name):
+            if name in memo:
+                return memo[name]
+            memo[name] = set()  # guards against cycles
+            result = set()
+            for dependency in self.dependencies.get(name, ()):
+                if dependency not in self.no_update:
+                    result |= causes(dependency)
+            if not result and self.fates.get(name) in self._changed:
+                result.add(name)
+            memo[name] = result
+            return result
+
+        rebuilt = []
+        affected = collections.Counter()
+        for name in self.updating:
+            if name not in self.locations:
+                continue
+            found = sorted(self._display(c) for c in causes(name))
+            affected.update(found)
+            reason = self._reasons.get(self.fates.get(name), "updated")
+            rebuilt.append((self._display(name), reason, found))
+
+        inputs = sorted(affected.items(), key=lambda i: (-i[1], i[0]))
+        return rebuilt, inputs
+
+    def _display(self, name):
+        if name in self.locations:
+            return self.locations[name]
+        return re.sub(r"^<[^>]*>", "", name)
+
+
+class SourceWatcher(object):
+    """
+    Watches a directory tree for changes of files. Uses inotify on Linux and
+    polls modification times on other systems. Hidden files and directories,
+    backup files and excluded directories are ignored.
+    """
+
+    # inotify event masks
+    _modify = 0x2
+    _attrib = 0x4
+    _close_write = 0x8
+    _moved_from = 0x40
+    _moved_to = 0x80
+    _create = 0x100
+    _delete = 0x200
+    _overflow = 0x4000
+    _is_dir = 0x40000000
+    _events = (
+        _modify | _attrib | _close_write | _moved_from | _moved_to | _create
+        | _delete
+    )
+
+    def __init__(self, directory, excluded=(), polling=False, interval=0.5):
+        """
+        :param directory: root of the watched tree.
+        :param excluded: directories inside the tree that are not watched.
+        :param polling: don't use inotify.
+        :param interval: seconds between polls.
+        """
+
+        self.directory = os.path.abspath(directory)
+        self._excluded = set(
+            os.path.normcase(os.path.abspath(e)) for e in excluded if e
+        )
+        self._interval = interval
+        self._watches = {}
+        self._fd = None
+        self._libc = None
+        if not polling:
+            self._init_inotify()
+        if self._fd is None:
+            self._snapshot = self._scan()
+            self._polled = time.time()
+
+    @property
+    def polling(self):
+        return self._fd is None
+
+    def wait(self, debounce=0.2, timeout=None):
+        """
+        Waits for changes (at most `timeout` seconds, if it is not None),
+        then collects changes until there are none for `debounce` seconds.
+        Returns the set of changed paths.
+        """
+
+        result = self.changes(timeout)
+        if not result and timeout is not None:
+            return result
+        while True:
+            changed = self.changes(debounce)
+            if not changed:
+                return result
+            result |= changed
+
+    def changes(self, timeout=None):
+        """
+        Returns the set of paths changed since the last call, waiting at most
+        `timeout` seconds (forever if `timeout` is None) for the first change.
+        """
+
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            if self._fd is None:
+                result = self._poll(deadline)
+            else:
+                result = self._read_events(deadline)
+            if result or (deadline is not None and time.time() >= deadline):
+                return result
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def _ignored(self, path):
+        name = os.path.basename(path)
+        return (
+            name.startswith((".", "#"))
+            or name.endswith(("~", ".swp", ".tmp"))
+            or os.path.normcase(path) in self._excluded
+        )
+
+    def _walk(self, directory=None):
+        for base, dirs, files in os.walk(directory or self.directory):
+            dirs[:] = [
+                d for d in dirs if not self._ignored(os.path.join(base, d))
+            ]
+            yield base, [
+                os.path.join(base, f) for f in files
+                if not self._ignored(os.path.join(base, f))
+            ]
+
+    def _scan(self):
+        snapshot = {}
+        for _, files in self._walk():
+            for path in files:
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def _poll(self, deadline):
+        delay = self._polled + self._interval - time.time()
+        if deadline is not None:
+            delay = min(delay, deadline - time.time())
+        if delay > 0:
+            time.sleep(delay)
+        if time.time() < self._polled + self._interval:
+            return set()
+
+        snapshot = self._scan()
+        self._polled = time.time()
+        changed = set(
+            p for p in set(snapshot) | set(self._snapshot)
+            if snapshot.get(p) != self._snapshot.get(p)
+        )
+        self._snapshot = snapshot
+        return changed
+
+    def _init_inotify(self):
+        if not sys.platform.startswith("linux"):
+            return
+        try:
+            import ctypes
+            import ctypes.util
+            libc = ctypes.CDLL(
+                ctypes.util.find_library("c") or None, use_errno=True
+            )
+            fd = libc.inotify_init1(os.O_CLOEXEC | os.O_NONBLOCK)
+        except (OSError, AttributeError):
+            return
+        if fd < 0:
+            return
+        self._libc = libc
+        self._fd = fd
+        self._watch_tree(self.directory)
+
+    def _watch_tree(self, directory):
+        added = set()
+        for base, files in self._walk(directory):
+            wd = self._libc.inotify_add_watch(
+                self._fd, os.fsencode(base), self._events
+            )
+            if wd >= 0:
+                self._watches[wd] = base
+            added.update(files)
+        return added
+
+    def _read_events(self, deadline):
+        import select
+
+        timeout = None if deadline is None else max(0, deadline - time.time())
+        if not select.select([self._fd], [], [], timeout)[0]:
+            return set()
+        try:
+            data = os.read(self._fd, 65536)
+        except BlockingIOError:
+            return set()
+
+        changed = set()
+        position = 0
+        while position + 16 <= len(data):
+            wd, mask, _, length = struct.unpack_from("iIII", data, position)
+            name = data[position + 16:position + 16 + length].rstrip(b"\0")
+            position += 16 + length
+
+            if mask & self._overflow:
+                # some events were lost, everything may have changed
+                changed.add(self.directory)
+                continue
+            base = self._watches.get(wd)
+            if base is None or not name:
+                continue
+            path = os.path.join(base, os.fsdecode(name))
+            if self._ignored(path):
+                continue
+            if mask & self._is_dir:
+                if mask & (self._create | self._moved_to):
+                    changed |= self._watch_tree(path)
+                else:
+                    changed.add(path)
+            else:
+                changed.add(path)
+        return changed
+
+
+class MemorySampler(object):
+    """
+    Samples resident set sizes of descendant processes of the current
+    process in a background thread, using the proc filesystem. `self.peak`
+    is the largest sampled size in bytes of a single process, or None if
+    nothing was sampled (e.g. on systems other than Linux). Processes that
+    live shorter than `interval` can be missed.
+    """
+
+    def __init__(self, interval=0.5, proc="/proc"):
+        self.peak = None
+        self._interval = interval
+        self._proc = proc
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        if os.path.isdir(os.path.join(self._proc, "self")):
+            self._page = os.sysconf("SC_PAGE_SIZE")
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+
+    def _run(self):
+        while True:
+            self.sample()
+            if self._stop.wait(self._interval):
+                return
+
+    def sample(self):
+        """Takes one sample and updates `self.peak`."""
+
+        children = collections.defaultdict(list)
+        sizes = {}
+        try:
+            names = os.listdir(self._proc)
+        except OSError:
+            return
+        for name in names:
+            if not name.isdigit():
+                continue
+            try:
+                with open(os.path.join(self._proc, name, "stat"), "rb") as f:
+                    stat = f.read()
+                # the command name is in parentheses and may contain spaces
+                fields = stat[stat.rindex(b")") + 2:].split()
+                children[int(fields[1])].append(int(name))
+                sizes[int(name)] = int(fields[21]) * self._page
+            except (IOError, OSError, ValueError, IndexError):
+                continue
+
+        pending = list(children[os.getpid()])
+        while pending:
+            pid = pending.pop()
+            self.peak = max(self.peak or 0, sizes.get(pid, 0))
+            pending.extend(children[pid])
+
+
+def interrupt(process):
+    """
+    Interrupts `process` started in a new process group together with its
+    children and waits for it to finish.
+    """
+
+    if process.poll() is not None:
+        return
+    try:
+        if tools.os_info.is_windows:
+            process.send_signal(signal.CTRL_BREAK_EVENT)
+        else:
+            # Boost.Build stops its commands and removes their partial
+            # outputs when interrupted
+            os.killpg(process.pid, signal.SIGINT)
+        process.wait(10)
+    except (OSError, subprocess.TimeoutExpired):
+        process.kill()
+        process.wait()
+
+    if not tools.os_info.is_windows:
+        # commands that ignore interruption shouldn't outlive the build
+        try:
+            os.killpg(process.pid, signal.SIGTERM)
+        except OSError:
+            pass
+
+
+LAUNCHER = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "launcher.py"
+)
+
+TOOLSET_MODULES = (
+    "gcc", "darwin", "clang-linux", "clang-darwin", "clang-win", "msvc",
+)
+
+GCC_LIKE_TOOLSET_MODULES = ("gcc", "darwin", "clang-linux", "clang-darwin")
+
+# toolset modules whose rules can be run via the launcher script
+LAUNCHED_RULES = {
+    "link": TOOLSET_MODULES,
+    "link.dll": TOOLSET_MODULES,
+    "compile.c": GCC_LIKE_TOOLSET_MODULES,
+    "compile.c++": GCC_LIKE_TOOLSET_MODULES,
+    "copy": ("common",),
+}
+
+
+@functools.lru_cache()
+def launcher_module():
+    """
+    Imports the launcher script as a module.
+    """
+
+    spec = importlib.util.spec_from_file_location(
+        "b2_helper_launcher", LAUNCHER
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def launcher_command(*args):
+    """
+    Returns the command line that runs the action launcher script with
+    arguments `args`.
+    """
+
+    return [sys.executable, LAUNCHER] + list(args)
+
+
+def default_shell():
+    """
+    Returns the default JAMSHELL of Boost.Build on the current platform.
+    """
+
+    if tools.os_info.is_windows:
+        return ["cmd.exe", "/Q/C", "%"]
+    return ["/bin/sh", "-c", "%"]
+
+
+def jam_list(items):
+    return " ".join('"%s"' % path_escaped(str(i)) for i in items)
+
+
+# options that don't affect the results of a build; the number of jobs
+# depends on available memory, so it changes between runs
+VOLATILE_OPTIONS = frozenset(("-j", "-d", "-q"))
+
+# Replaces builtin rule SHELL while toolsets are initialized. The argument is
+# the body of the replacement, which has access to the command, its options
+# and the key that identifies them.
+SHELL_OVERRIDE = """\
+IMPORT : SHELL : : b2-helper.SHELL ;
+rule b2-helper-shell ( command : * )
+{{
+    local key = [ MD5 "$(command)|$(2:J=,:E=)" ] ;
+    {0}
+    return $(result) ;
+}}
+IMPORT project-config : b2-helper-shell : : SHELL ;
+"""
+
+SHELL_RESTORE = "IMPORT : b2-helper.SHELL : : SHELL ;\n"
+
+TOOLSET_CACHE_HEADER = "# b2-helper toolsets "
+
+# environment variables that may affect toolset initialization
+TOOLSET_ENVIRONMENT = (
+    "PATH", "CC", "CXX", "CFLAGS", "CXXFLAGS", "CPPFLAGS", "LDFLAGS", "AR",
+    "AS", "RANLIB", "STRIP", "RC", "INCLUDE", "LIB", "LIBPATH",
+    "LD_LIBRARY_PATH", "DYLD_LIBRARY_PATH", "SDKROOT", "DEVELOPER_DIR",
+    "VSINSTALLDIR", "VCINSTALLDIR",
+)
+
+
+def parse_shell_records(output):
+    """
+    Parses the output of Boost.Build run with SHELL replaced by the recording
+    rule. Returns a list of pairs of keys and results and a list of
+    executables that were run.
+    """
+
+    entries = []
+    tools_used = []
+    lines = iter(output.split("\n"))
+    for line in lines:
+        if not line.startswith("@b2-helper-shell "):
+            continue
+        key = line.split()[1]
+        command = next(lines, "")[len("@b2-helper-command "):]
+        try:
+            tool = shlex.split(command, posix=not tools.os_info.is_windows)
+        except ValueError:
+            tool = None
+        if tool:
+            tool = tool[0].strip('"')
+            if tool not in tools_used:
+                tools_used.append(tool)
+
+        items = []
+        for line in lines:
+            if line == "@b2-helper-end":
+                break
+            elif line == "@b2-helper-item":
+                items.append([])
+            elif items:
+                items[-1].append(line)
+        items = ["\n".join(i) for i in items]
+        # values that would be expanded by jam can't be cached
+        if items and not any("$(" in i for i in items):
+            entries.append((key, items))
+    return entries, tools_used
+
+
+BUILD_INFO_PATTERN = re.compile(r"conanbuildinfo(-.*)?\.jam$", re.I)
+
+BUILD_INFO_PROJECT = re.compile(r"^project-define (\S+) ;$", re.M)
+
+BUILD_INFO_PROJECT_BLOCK = re.compile(
+    r"^# (\S+)\nproject-define \1 ;\n", re.M
+)
+
+BUILD_INFO_SECTION = re.compile(r"^# (\S+)$", re.M)
+
+BUILD_INFO_DEPENDENCY = re.compile(r"/([^/\s]+)//libs\b")
+
+
+def referenced_packages(packages, jamfiles):
+    """
+    Returns the set of names from `packages` that occur in files `jamfiles`
+    as separate words. Files that can't be read are skipped.
+    """
+
+    if not packages:
+        return set()
+    pattern = re.compile(
+        r"(?<![\w-])(%s)(?![\w-])" % "|".join(
+            re.escape(p) for p in sorted(packages, key=len, reverse=True)
+        ),
+        re.I,
+    )
+    result = set()
+    for jamfile in jamfiles:
+        try:
+            with open(jamfile, errors="replace") as file:
+                text = file.read()
+        except (IOError, OSError):
+            continue
+        result.update(m.lower() for m in pattern.findall(text))
+        if len(result) == len(packages):
+            break
+    return result
+
+
+def package_closure(used, sources):
+    """
+    Extends set of package names `used` with packages their targets depend
+    on in Conan build info files `sources` (a dict of file names to their
+    contents).
+    """
+
+    dependencies = collections.defaultdict(set)
+    for text in sources.values():
+        for name, section in build_info_sections(text):
+            dependencies[name].update(BUILD_INFO_DEPENDENCY.findall(section))
+
+    result = set()
+    pending = list(used)
+    while pending:
+        name = pending.pop()
+        if name not in result:
+            result.add(name)
+            pending.extend(dependencies[name])
+    return result
+
+
+def build_info_sections(text):
+    """
+    Splits Conan build info file `text` into sections that start with a
+    "# <package>" comment. Yields pairs of package names and section texts,
+    text before the first section has name None.
+    """
+
+    position = 0
+    name = None
+    for match in BUILD_INFO_SECTION.finditer(text):
+        yield name, text[position:match.start()]
+        position = match.start()
+        name = match.group(1)
+    yield name, text[position:]
+
+
+def prune_build_info(text, used):
+    """
+    Removes sections of packages that are not in set `used` from Conan build
+    info file `text`. Global section is always kept.
+    """
+
+    # the main file declares a project for every package, other files define
+    # constants and targets
+    if BUILD_INFO_PROJECT.search(text):
+        return BUILD_INFO_PROJECT_BLOCK.sub(
+            lambda m: m.group(0) if m.group(1) in used else "", text
+        )
+    return "".join(
+        section for (name, section) in build_info_sections(text)
+        if name is None or name == "global" or name in used
+    )
+
+
+def executable_identity(name):
+    """
+    Returns the path, size and modification time of executable `name`.
+    """
+
+    path = shutil.which(name) or name
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return [path]
+    return [path, stat.st_size, stat.st_mtime_ns]
+
+
+def chrome_trace(records):
+    """
+    Converts action timing records logged by the launcher into Chrome trace
+    format. Actions are distributed between lanes, so that every lane
+    corresponds to a Boost.Build job slot.
+    """
+
+    records = sorted(records, key=lambda r: (r["start"], r["end"]))
+    origin = records[0]["start"] if records else 0
+
+    lanes = []
+    events = []
+    for record in records:
+        for lane, end in enumerate(lanes):
+            if end <= record["start"]:
+                break
+        else:
+            lane = len(lanes)
+            lanes.append(None)
+        lanes[lane] = record["end"]
+
+        events.append(dict(
+            name=os.path.basename(record.get("target") or record["name"]),
+            cat=record["name"],
+            ph="X",
+            ts=int((record["start"] - origin) * 1e6),
+            dur=int((record["end"] - record["start"]) * 1e6),
+            pid=1,
+            tid=lane,
+            args=dict(target=record.get("target"), result=record["result"]),
+        ))
+
+    for lane in range(len(lanes)):
+        events.append(dict(
+            name="thread_name",
+            ph="M",
+            pid=1,
+            tid=lane,
+            args=dict(name="job %s" % (lane + 1)),
+        ))
+    return dict(traceEvents=events, displayTimeUnit="ms")
+
+
+def resource_usage():
+    """
+    Returns resources used by all finished child processes of the current
+    process: user and system CPU time in seconds, bytes read from and written
+    to storage and the peak resident set size in bytes of the largest process
+    since the current process started. Values that can't be determined on the
+    current platform are omitted.
+    """
+
+    result = {}
+    try:
+        import resource
+    except ImportError:
+        return result
+
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    result["user_time"] = usage.ru_utime
+    result["system_time"] = usage.ru_stime
+    # macOS reports bytes, other systems report KiB
+    result["peak_rss"] = usage.ru_maxrss * (
+        1 if sys.platform == "darwin" else 1024
+    )
+    result["read_bytes"] = usage.ru_inblock * 512
+    result["write_bytes"] = usage.ru_oublock * 512
+
+    # I/O of reaped children is added to the parent's counters on Linux
+    try:
+        with open("/proc/self/io") as file:
+            for line in file:
+                key, value = line.split(":")
+                if key in ("read_bytes", "write_bytes"):
+                    result[key] = int(value)
+    except (IOError, OSError, ValueError):
+        pass
+    return result
+
+
+def build_phase(targets):
+    if list(targets) in (["install"], ["test"]):
+        return targets[0]
+    return "build"
+
+
+def format_duration(seconds):
+    minutes, seconds = divmod(seconds, 60)
+    if minutes:
+        return "%dm%02ds" % (minutes, seconds)
+    return "%.1fs" % seconds
+
+
+def stamp_key(targets):
+    return " ".join(targets) or "."
+
+
+def tree_digest(roots, excluded=(), full=False):
+    """
+    Returns SHA-256 hex digest of the state of directory trees `roots`.
+    By default the state of a file is its path, size and modification time;
+    if `full` is truthy, its contents are used instead. Directories in
+    `excluded`, `.git` directories and the helper's own state files (which
+    start with "b2-helper-") are skipped.
+    """
+
+    excluded = set(os.path.abspath(e) for e in excluded)
+    roots = sorted(set(os.path.abspath(r) for r in roots if r))
+    # nested roots are walked as parts of their parents
+    roots = [
+        r for r in roots
+        if not any(r.startswith(os.path.join(o, "")) for o in roots)
+    ]
+
+    digest = hashlib.sha256()
+    for root in roots:
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames[:] = sorted(
+                d for d in dirnames
+                if d != ".git" and os.path.join(dirpath, d) not in excluded
+            )
+            for name in sorted(filenames):
+                if name.startswith("b2-helper-"):
+                    continue
+                path = os.path.join(dirpath, name)
+                if full:
+                    state = file_digest(path)
+                else:
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    state = "%s:%s" % (stat.st_size, stat.st_mtime_ns)
+                digest.update(("%s\0%s\0" % (path, state)).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def parse_size(size):
+    """
+    Converts a size like 1024, "512K", "100M" or "10G" to the number of bytes.
+    """
+
+    size = str(size).strip().upper()
+    units = {"K": 1 << 10, "M": 1 << 20, "G": 1 << 30, "T": 1 << 40}
+    if size[-1:] in units:
+        return int(float(size[:-1]) * units[size[-1]])
+    return int(size)
+
+
+def trim_cache(directory, max_size):
+    """
+    Removes least recently used entries from cache directory `directory`
+    until its total size is not bigger than `max_size` bytes. Leftover
+    temporary files from interrupted writes are removed too. Safe to be called
+    by several processes at the same time.
+    """
+
+    if not os.path.isdir(directory):
+        return
+
+    with fasteners.InterProcessLock(os.path.join(directory, "trim.lock")):
+        entries = []
+        now = time.time()
+        for root, _, files in os.walk(directory):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                    if name.endswith(".tmp") and now - stat.st_mtime > 3600:
+                        os.remove(path)
+                    elif not name.endswith((".tmp", ".lock")):
+                        entries.append((stat.st_mtime, stat.st_size, path))
+                except OSError:
+                    pass
+
+        total = sum(size for (_, size, _) in entries)
+        for _, size, path in sorted(entries):
+            if total <= max_size:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+
+# commands are run by the shell: cmd.exe limits command line to 8191
+# characters, and on Linux a single argument (the command passed to sh -c)
+# can't be longer than 128 KiB; some room is left for the wrappers Conan
+# may add to the command
+COMMAND_LINE_LIMIT = 8000 if os.name == "nt" else 120 * 1024
+
+
+def join_command(args):
+    """
+    Returns a shell command that runs command line `args`.
+    """
+
+    if os.name == "nt":
+        return subprocess.list2cmdline(args)
+    return " ".join(shlex.quote(a) for a in args)
+
+
+def command_length(args):
+    return len(join_command(args).encode("utf-8"))
+
+
+def render_request(request):
+    """
+    Returns jam code that adds targets and build request elements `request`
+    to command line arguments that Boost.Build parses.
+    """
+
+    return (
+        "import modules ;\n"
+        "modules.poke build-system : .argv :\n"
+        "  [ modules.peek build-system : .argv ]\n"
+        + "".join("  %s\n" % jam_string(r) for r in request)
+        + "  ;\n"
+    )
+
+
+def jam_string(s):
+    return '"%s"' % s.replace("\\", "\\\\").replace('"', '\\"')
+
+
+def unique(items):
+    """
+    Yields items of iterable `items` skipping the ones that were already
+    yielded.
+    """
+
+    seen = set()
+    for item in items:
+        if item not in seen:
+            seen.add(item)
+            yield item
 
 
 def path_escaped(path):
     if os.sep == "\\":
         path  = path.replace("\\", "\\\\")
     return path
+
+
+def file_digest(path):
+    """
+    Returns SHA-256 hex digest of the contents of file `path` or None if the
+    file does not exist.
+    """
+
+    digest = hashlib.sha256()
+    try:
+        with open(path, "rb") as file:
+            for chunk in iter(lambda: file.read(65536), b""):
+                digest.update(chunk)
+    except (IOError, OSError):
+        return None
+    return digest.hexdigest()
+
+
+def replace_if_changed(path, content):
+    """
+    Writes string `content` to file `path`, unless the file already has the
+    same content. The file is replaced atomically, so readers never see
+    a partially written file.
+
+    :returns: True if the file was written.
+    """
+
+    data = content.encode("utf-8")
+    if hashlib.sha256(data).hexdigest() == file_digest(path):
+        return False
+
+    fd, temp = tempfile.mkstemp(
+        dir=os.path.dirname(os.path.abspath(path)),
+        prefix=os.path.basename(path) + ".",
+        suffix=".tmp",
+    )
+    try:
+        with os.fdopen(fd, "wb") as file:
+            file.write(data)
+        # mkstemp creates private files, use the same mode as open() would
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(temp, 0o666 & ~umask)
+        os.replace(temp, path)
+    except:
+        os.remove(temp)
+        raise
+    return True
+
+
+def job_count(memory_per_job=None):
+    """
+    Chooses the number of parallel jobs. Unless environment variable
+    `CONAN_CPU_COUNT` is set, the result is limited by the number of available
+    CPUs (taking into account CPU affinity and cgroup quotas) and by available
+    memory (taking into account cgroup limits) divided by the expected memory
+    usage of one job.
+
+    :param memory_per_job: expected memory usage of one job in MiB. Defaults to
+                           the value of environment variable
+                           `CONAN_B2_JOB_MEMORY` or 1024.
+    :returns: a pair of the number of jobs and a string explaining the choice.
+    """
+
+    if tools.get_env("CONAN_CPU_COUNT"):
+        return tools.cpu_count(), "set by CONAN_CPU_COUNT"
+
+    cpus = tools.cpu_count()
+    reason = "%s CPU(s)" % cpus
+    limit = cpu_limit()
+    if limit is not None and limit < cpus:
+        cpus = limit
+        reason = "%s CPU(s) available to the process" % cpus
+
+    if memory_per_job is None:
+        value = tools.get_env("CONAN_B2_JOB_MEMORY", "1024")
+        try:
+            memory_per_job = int(value)
+        except ValueError:
+            raise ConanException(
+                "Invalid CONAN_B2_JOB_MEMORY value '%s', please specify a"
+                " number of MiB" % value
+            )
+    memory = available_memory()
+    if memory is None or memory_per_job <= 0:
+        return cpus, reason
+
+    memory_jobs = max(1, memory // (memory_per_job * 1024 * 1024))
+    if memory_jobs >= cpus:
+        return cpus, reason
+    return memory_jobs, (
+        "%s MiB of available memory, %s MiB per job (%s)"
+        % (memory // (1024 * 1024), memory_per_job, reason)
+    )
+
+
+def cpu_limit(root="/sys/fs/cgroup", proc="/proc"):
+    """
+    Returns the number of CPUs the current process may use according to its
+    CPU affinity and cgroup CPU quota or None if it can't be determined.
+    `root` and `proc` are where cgroup and proc filesystems are mounted.
+    """
+
+    result = None
+    try:
+        result = len(os.sched_getaffinity(0))
+    except (AttributeError, OSError):
+        pass
+
+    for directory in cgroup_directories("cpu", root, proc):
+        try:
+            quota, period = tools.load(
+                os.path.join(directory, "cpu.max")
+            ).split()
+        except (IOError, OSError, ValueError):
+            try:
+                # cgroup v1, unlimited quota is -1
+                quota, period = (
+                    tools.load(os.path.join(directory, name)).strip()
+                    for name in ("cpu.cfs_quota_us", "cpu.cfs_period_us")
+                )
+            except (IOError, OSError):
+                continue
+        try:
+            quota = int(math.ceil(int(quota) / int(period)))
+        except (ValueError, ZeroDivisionError):
+            continue
+        if quota > 0:
+            result = min(quota, result or quota)
+    return result
+
+
+def available_memory(root="/sys/fs/cgroup", proc="/proc"):
+    """
+    Returns the amount of memory in bytes available to the current process
+    according to /proc/meminfo and cgroup memory limits or None if it can't be
+    determined. `root` and `proc` are where cgroup and proc filesystems are
+    mounted.
+    """
+
+    result = None
+    try:
+        with open(os.path.join(proc, "meminfo")) as file:
+            for line in file:
+                if line.startswith("MemAvailable:"):
+                    result = int(line.split()[1]) * 1024
+                    break
+    except (IOError, OSError, ValueError):
+        pass
+
+    for directory in cgroup_directories("memory", root, proc):
+        for limit, usage in (
+            ("memory.max", "memory.current"),
+            ("memory.limit_in_bytes", "memory.usage_in_bytes"),
+        ):
+            try:
+                free = (
+                    int(tools.load(os.path.join(directory, limit)))
+                    - int(tools.load(os.path.join(directory, usage)))
+                )
+            except (IOError, OSError, ValueError):
+                continue
+            result = max(0, min(free, result or free))
+    return result
+
+
+def cgroup_directories(controller, root="/sys/fs/cgroup", proc="/proc"):
+    """
+    Yields candidate cgroup directories of the current process for controller
+    `controller`, for both cgroup v1 and cgroup v2 hierarchies. `root` and
+    `proc` are where cgroup and proc filesystems are mounted.
+    """
+
+    roots = (os.path.join(root, controller), root)
+    paths = ["/"]
+    try:
+        with open(os.path.join(proc, "self", "cgroup")) as file:
+            for line in file:
+                _, controllers, path = line.rstrip("\n").split(":", 2)
+                if not controllers or controller in controllers.split(","):
+                    paths.append(path)
+    except (IOError, OSError, ValueError):
+        pass
+
+    seen = set()
+    for root in roots:
+        for path in paths:
+            directory = os.path.normpath(os.path.join(root, path.lstrip("/")))
+            if directory not in seen and os.path.isdir(directory):
+                seen.add(directory)
+                yield directory
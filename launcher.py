@@ -0,0 +1,454 @@
+# Copyright (c) 2020 Dmitry Arkhipov <grisumbras@gmail.com>
+#
+# Distributed under the Boost Software License, Version 1.0. (See accompanying
+# file LICENSE or copy at http://www.boost.org/LICENSE_1_0.txt)
+
+
+"""
+Action launcher used by b2-helper. Boost.Build runs some of its actions via
+this script (by setting JAMSHELL for them), and the script runs the actual
+command. The script should only depend on the standard library, as it is
+started once per action.
+"""
+
+
+import argparse
+import filecmp
+import hashlib
+import json
+import os
+import shlex
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="launcher")
+    parser.add_argument(
+        "--slots", type=int,
+        help="limit the number of concurrently running commands",
+    )
+    parser.add_argument("--locks", help="directory with slot lock files")
+    parser.add_argument(
+        "--cache", help="directory of the shared compilation cache",
+    )
+    parser.add_argument("--cache-log", help="file to log cache hits into")
+    parser.add_argument(
+        "--compile-db", help="file to log compilation commands into",
+    )
+    parser.add_argument(
+        "--recordable-copy", action="store_true",
+        help="record the copy command instead of running it, if environment"
+        " variable B2_HELPER_COPY_RECORD names the file to record into",
+    )
+    parser.add_argument(
+        "--install-mode", choices=INSTALL_MODES, default="copy",
+        help="how the copy command installs files",
+    )
+    parser.add_argument(
+        "--skip-unchanged", action="store_true",
+        help="don't replace installed files that have the same contents",
+    )
+    parser.add_argument("--trace", help="file to log command timings into")
+    parser.add_argument("--trace-name", help="action name used in timings")
+    parser.add_argument("command", nargs=argparse.REMAINDER)
+
+    args = parser.parse_args(argv)
+    command = args.command
+    if command and command[0] == "--":
+        command = command[1:]
+    if not command:
+        parser.error("command is required")
+
+    if args.compile_db:
+        log_compilation(args.compile_db, command)
+
+    started = time.time()
+    result = None
+    slot = acquire_slot(args.locks, args.slots) if args.slots else None
+    try:
+        result = install(args, command)
+        if result is None and args.cache:
+            result = cached(args.cache, args.cache_log, command)
+        elif result is None:
+            result = subprocess.call(command)
+        return result
+    finally:
+        if slot is not None:
+            slot.close()
+        if args.trace:
+            log_timing(
+                args.trace, args.trace_name, command, started, result
+            )
+
+
+def install(args, command):
+    """
+    Handles copy `command` according to `args`: records it, if recording is
+    requested, or installs the file in the requested mode, skipping unchanged
+    files if requested. Returns None if the command should be run as usual.
+    """
+
+    if not (
+        args.recordable_copy
+        or args.skip_unchanged
+        or args.install_mode != "copy"
+    ):
+        return None
+    copy = parse_copy(command)
+    if copy is None:
+        return None
+    source, destination = copy
+
+    record = os.environ.get("B2_HELPER_COPY_RECORD")
+    if args.recordable_copy and record:
+        append_record(record, dict(
+            source=os.path.abspath(source),
+            destination=os.path.abspath(destination),
+        ))
+        return 0
+    if args.install_mode == "copy" and not args.skip_unchanged:
+        return None
+
+    install_file(
+        source, destination, args.install_mode, args.skip_unchanged,
+    )
+    return 0
+
+
+def acquire_slot(locks, slots):
+    """
+    Acquires one of `slots` lock files in directory `locks`. Lock files are
+    shared by all processes on the host, so at most `slots` processes hold
+    them at the same time. Returns the open lock file, closing it releases the
+    lock.
+    """
+
+    makedirs(locks)
+
+    delay = 0.05
+    while True:
+        for n in range(max(1, slots)):
+            slot = open(os.path.join(locks, "slot-%s.lock" % n), "a")
+            if try_lock(slot):
+                return slot
+            slot.close()
+        time.sleep(delay)
+        delay = min(delay * 2, 1)
+
+
+def try_lock(file):
+    try:
+        if sys.platform == "win32":
+            import msvcrt
+            msvcrt.locking(file.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except (IOError, OSError):
+        return False
+    return True
+
+
+def cached(cache, log, command):
+    """
+    Runs compilation `command` (a POSIX shell invocation of a gcc-like
+    compiler) unless its output is already in directory `cache`. Cache entries
+    are keyed on the command line with the output path removed, the compiler
+    executable and the preprocessed source, with path prefix maps from the
+    command line applied. Commands that can't be analyzed are run
+    unconditionally.
+    """
+
+    compilation = parse_compilation(command)
+    if compilation is None:
+        return subprocess.call(command)
+    argv, output = compilation
+
+    key = compilation_key(argv, output)
+    if key is None:
+        return subprocess.call(command)
+
+    entry = os.path.join(cache, key[:2], key)
+    try:
+        copy_atomically(entry, output)
+        # cache entries are evicted in least recently used order
+        os.utime(entry, None)
+        log_cache_result(log, "hit")
+        return 0
+    except (IOError, OSError):
+        pass
+
+    result = subprocess.call(command)
+    if result == 0 and os.path.isfile(output):
+        try:
+            copy_atomically(output, entry)
+        except (IOError, OSError):
+            pass
+    log_cache_result(log, "miss")
+    return result
+
+
+def parse_compilation(command):
+    # only the `/bin/sh -c` form of JAMSHELL is recognized, the quoting rules
+    # of cmd.exe are different, and msvc compilations use response files
+    if len(command) < 3 or command[-2] != "-c":
+        return None
+    try:
+        argv = shlex.split(command[-1])
+    except ValueError:
+        return None
+    if "-c" not in argv or argv.count("-o") != 1:
+        return None
+    position = argv.index("-o")
+    if position + 1 >= len(argv):
+        return None
+    return argv, argv[position + 1]
+
+
+def compilation_key(argv, output):
+    position = argv.index("-o")
+    preprocess = argv[:position] + argv[position + 2:]
+    preprocess = [a for a in preprocess if a != "-c"] + ["-E"]
+    try:
+        source = subprocess.check_output(preprocess, stderr=subprocess.DEVNULL)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+    # the compiler maps paths according to prefix maps, so results are the
+    # same if inputs are the same after mapping
+    maps = []
+    args = []
+    for arg in argv[:position] + ["-o"] + argv[position + 2:]:
+        for option in PREFIX_MAP_OPTIONS:
+            if arg.startswith(option) and "=" in arg[len(option):]:
+                maps.append(arg[len(option):].split("=", 1))
+                break
+        else:
+            args.append(arg)
+    maps.sort(key=lambda m: len(m[0]), reverse=True)
+
+    def mapped(text):
+        for old, new in maps:
+            text = text.replace(old, new)
+        return text
+
+    digest = hashlib.sha256(b"b2-helper-1\0")
+    for arg in args:
+        digest.update(mapped(arg).encode("utf-8") + b"\0")
+    for tool in compiler_executables(argv):
+        digest.update(tool.encode("utf-8") + b"\0")
+    source = source.decode("utf-8", "surrogateescape")
+    digest.update(mapped(source).encode("utf-8", "surrogateescape"))
+    return digest.hexdigest()
+
+
+PREFIX_MAP_OPTIONS = (
+    "-ffile-prefix-map=", "-fdebug-prefix-map=", "-fmacro-prefix-map=",
+)
+
+
+def compiler_executables(argv):
+    """
+    Yields identities (path, size and modification time) of the compiler
+    executable and of the compiler wrapped by a compiler cache.
+    """
+
+    tools = argv[:1]
+    if os.path.basename(argv[0]).startswith(("ccache", "sccache")):
+        tools = argv[:2]
+    for tool in tools:
+        path = shutil.which(tool) or tool
+        try:
+            stat = os.stat(path)
+        except OSError:
+            yield path
+            continue
+        yield "%s:%s:%s" % (path, stat.st_size, stat.st_mtime)
+
+
+def copy_atomically(source, destination):
+    directory = os.path.dirname(os.path.abspath(destination))
+    makedirs(directory)
+    fd, temp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    os.close(fd)
+    try:
+        shutil.copyfile(source, temp)
+        os.replace(temp, destination)
+    except:
+        os.remove(temp)
+        raise
+
+
+INSTALL_MODES = ("copy", "hardlink", "reflink")
+
+# ioctl request that makes a file share data blocks with another file on
+# filesystems that support it (btrfs, xfs)
+FICLONE = 0x40049409
+
+
+def install_file(source, destination, mode="copy", skip_unchanged=False):
+    """
+    Atomically replaces `destination` with a hard link to `source`, a reflink
+    of `source` or a copy of `source` (preserving permissions and modification
+    time), depending on `mode`. If a link can't be created, the file is
+    copied. If `skip_unchanged` is true and `destination` has the same
+    contents as `source`, it is left as is. Returns the mode that was used or
+    "unchanged".
+    """
+
+    if (
+        skip_unchanged
+        and os.path.isfile(destination)
+        and filecmp.cmp(source, destination, shallow=False)
+    ):
+        return "unchanged"
+
+    directory = os.path.dirname(os.path.abspath(destination))
+    makedirs(directory)
+    fd, temp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    os.close(fd)
+    try:
+        if mode == "hardlink" and hardlink(source, temp):
+            pass
+        elif mode == "reflink" and reflink(source, temp):
+            pass
+        else:
+            mode = "copy"
+            shutil.copy2(source, temp)
+        os.replace(temp, destination)
+    except:
+        if os.path.exists(temp):
+            os.remove(temp)
+        raise
+    return mode
+
+
+def hardlink(source, temp):
+    os.remove(temp)
+    try:
+        os.link(source, temp)
+    except (OSError, AttributeError):
+        # the caller expects the file to exist
+        open(temp, "wb").close()
+        return False
+    return True
+
+
+def reflink(source, temp):
+    try:
+        import fcntl
+    except ImportError:
+        return False
+    try:
+        with open(source, "rb") as src, open(temp, "wb") as dst:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        shutil.copystat(source, temp)
+    except (IOError, OSError):
+        return False
+    return True
+
+
+def log_cache_result(log, result):
+    if not log:
+        return
+    try:
+        with open(log, "a") as file:
+            file.write(result + "\n")
+    except (IOError, OSError):
+        pass
+
+
+def log_compilation(log, command):
+    """
+    Appends a compilation database entry for compilation `command` to file
+    `log`. Commands that can't be analyzed are skipped.
+    """
+
+    compilation = parse_compilation(command)
+    if compilation is None:
+        return
+    argv, output = compilation
+    if argv[-1].startswith("-") or argv[-1] == output:
+        return
+
+    append_record(log, dict(
+        directory=os.getcwd(), arguments=argv, file=argv[-1], output=output,
+    ))
+
+
+def parse_copy(command):
+    """
+    Returns source and destination of a copy command run by the shell, or
+    None if the command is not recognized.
+    """
+
+    try:
+        argv = shlex.split(command[-1], posix=sys.platform != "win32")
+    except ValueError:
+        return None
+    argv = [a.strip('"') for a in argv]
+    # Windows copy command is followed by /b and source by a hack that makes
+    # it fail if source is missing
+    if len(argv) == 6 and argv[1] == "/b" and argv[3] == "+":
+        return argv[2], argv[5]
+    if len(argv) == 3 and os.path.basename(argv[0]) == "cp":
+        return argv[1], argv[2]
+    return None
+
+
+def append_record(log, record):
+    """
+    Appends JSON `record` to file `log`. Records are written with a single
+    call to write, so that records of concurrently running commands don't
+    interleave.
+    """
+
+    try:
+        fd = os.open(log, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o666)
+        try:
+            os.write(fd, (json.dumps(record) + "\n").encode("utf-8"))
+        finally:
+            os.close(fd)
+    except (IOError, OSError):
+        pass
+
+
+def log_timing(log, name, command, started, result):
+    """
+    Appends a record with timing of `command` to file `log`.
+    """
+
+    append_record(log, dict(
+        name=name or os.path.basename(command[0]),
+        target=command_output(command),
+        start=started,
+        end=time.time(),
+        result=result,
+    ))
+
+
+def command_output(command):
+    try:
+        argv = shlex.split(command[-1])
+    except ValueError:
+        return None
+    if argv.count("-o") != 1:
+        return None
+    position = argv.index("-o")
+    return argv[position + 1] if position + 1 < len(argv) else None
+
+
+def makedirs(directory):
+    try:
+        os.makedirs(directory)
+    except OSError:
+        if not os.path.isdir(directory):
+            raise
+
+
+if __name__ == "__main__":
+    sys.exit(main())
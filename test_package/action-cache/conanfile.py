@@ -0,0 +1,45 @@
+# Copyright (c) 2020 Dmitry Arkhipov <grisumbras@gmail.com>
+#
+# Distributed under the Boost Software License, Version 1.0. (See accompanying
+# file LICENSE or copy at http://www.boost.org/LICENSE_1_0.txt)
+
+
+from conans import (
+    ConanFile,
+    tools,
+)
+from get_helper_package import package_ref
+import os
+import shutil
+
+
+class MyConan(ConanFile):
+    """Compilation results are reused by a build in other folders"""
+
+    build_requires = "b2/[*]"
+    python_requires = package_ref
+    python_requires_extend = "b2-helper.Mixin"
+
+    settings = "os", "compiler", "build_type", "arch",
+    exports_sources = "*.cpp", "*.jam"
+
+    def b2_setup_builder(self, builder):
+        builder.action_cache = os.path.join(self.build_folder, "cache")
+        builder.properties.reproducible = True
+        return builder
+
+    def build(self):
+        super(MyConan, self).build()
+        if self.settings.compiler not in ("gcc", "clang"):
+            return
+
+        b2 = self.python_requires["b2-helper"].module
+        builder = self.b2_setup_builder(b2.B2(self))
+        builder.build_folder = "second"
+        builder.source_folder = os.path.join(self.build_folder, "src-copy")
+        shutil.copytree(self.source_folder, builder.source_folder)
+        builder.configure()
+        builder.build()
+
+        log = os.path.join(builder.build_folder, "b2-helper-cache.log")
+        assert tools.load(log).split() == ["hit"]
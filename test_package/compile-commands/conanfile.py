@@ -0,0 +1,47 @@
+# Copyright (c) 2020 Dmitry Arkhipov <grisumbras@gmail.com>
+#
+# Distributed under the Boost Software License, Version 1.0. (See accompanying
+# file LICENSE or copy at http://www.boost.org/LICENSE_1_0.txt)
+
+
+from conans import (
+    ConanFile,
+    tools,
+)
+from get_helper_package import package_ref
+import json
+import os
+
+
+class MyConan(ConanFile):
+    """Compilation database is produced while building"""
+
+    build_requires = "b2/[*]"
+    python_requires = package_ref
+    python_requires_extend = "b2-helper.Mixin"
+
+    settings = "os", "compiler", "build_type", "arch",
+    exports_sources = "*.cpp", "*.hpp", "*.jam"
+
+    def b2_setup_builder(self, builder):
+        builder.compile_commands = True
+        self._builder = builder
+        return builder
+
+    def build(self):
+        super(MyConan, self).build()
+        if self.settings.compiler not in ("gcc", "clang"):
+            return
+
+        entries = self._entries()
+        assert [e["file"] for e in entries] == ["main.cpp"]
+        assert entries[0]["directory"] == self.source_folder
+        assert "-c" in entries[0]["arguments"]
+
+        # nothing is recompiled, the entry is kept
+        self._builder.build()
+        assert self._entries() == entries
+
+    def _entries(self):
+        path = os.path.join(self.build_folder, "compile_commands.json")
+        return json.loads(tools.load(path))
@@ -0,0 +1,40 @@
+# Copyright (c) 2020 Dmitry Arkhipov <grisumbras@gmail.com>
+#
+# Distributed under the Boost Software License, Version 1.0. (See accompanying
+# file LICENSE or copy at http://www.boost.org/LICENSE_1_0.txt)
+
+
+from conans import (
+    ConanFile,
+    tools,
+)
+from get_helper_package import package_ref
+import os
+import re
+
+
+class MyConan(ConanFile):
+    """Compiler cache set on the builder wraps the default toolset"""
+
+    build_requires = "b2/[*]"
+    python_requires = package_ref
+    python_requires_extend = "b2-helper.Mixin"
+
+    settings = "os", "compiler", "build_type", "arch",
+    exports_sources = "*.cpp", "*.jam"
+
+    def b2_setup_builder(self, builder):
+        # env runs the command it is given, so it works as a trivial cache
+        builder.compiler_cache = "env"
+        return builder
+
+    def build(self):
+        super(MyConan, self).build()
+
+        config = os.path.join(self.build_folder, "project-config.jam")
+        using = [
+            line for line in tools.load(config).splitlines()
+            if re.search(r"\{ using (gcc|clang) ", line)
+        ]
+        assert len(using) == 1
+        assert re.search(r" : env \S+", using[0]), using[0]
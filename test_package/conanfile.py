@@ -8,7 +8,11 @@ from conans import (
     ConanFile,
     tools,
 )
+from conans.errors import ConanException
+import concurrent.futures
 import os
+import subprocess
+import time
 
 
 class TestB2Helper(ConanFile):
@@ -24,18 +28,48 @@ class TestB2Helper(ConanFile):
         "propagate-subdir",
         "build-targets",
         "preexisting-toolset",
+        "reconfigure",
+        "single-invocation",
+        "variants",
+        "link-jobs",
+        "job-count",
+        "reproducible",
+        "reproducible-variants",
+        "action-cache",
+        "compiler-cache-attribute",
+        "up-to-date",
+        "toolset-cache",
+        "summary",
+        "trace",
+        "metrics",
+        "profile",
+        "explain",
+        "compile-commands",
+        "long-command-line",
+        "install-manifest",
+        "install-after-no-op",
+        "install-mode",
+        "incremental-install",
+        "prune-dependencies",
+        "watch",
     )
-    _intall_cmd = "conan install %s -if tmp/conan"
-    _source_cmd = "conan source %s -if tmp/conan -sf tmp/src"
-    _build_cmd = (
-        "conan build %s -if tmp/conan -sf tmp/src -bf tmp/build -pf tmp/stage"
-    )
-    _package_cmd = (
-        "conan package %s"
-        " -if tmp/conan"
-        " -sf tmp/src"
-        " -bf tmp/build"
-        " -pf tmp/stage"
+    _commands = (
+        ("install", "%s", "-if", "tmp/conan"),
+        ("source", "%s", "-if", "tmp/conan", "-sf", "tmp/src"),
+        (
+            "build", "%s",
+            "-if", "tmp/conan",
+            "-sf", "tmp/src",
+            "-bf", "tmp/build",
+            "-pf", "tmp/stage",
+        ),
+        (
+            "package", "%s",
+            "-if", "tmp/conan",
+            "-sf", "tmp/src",
+            "-bf", "tmp/build",
+            "-pf", "tmp/stage",
+        ),
     )
 
     def test(self):
@@ -43,16 +77,106 @@ class TestB2Helper(ConanFile):
             "PACKAGE_REFERENCE": str(self.requires["b2-helper"].ref),
             "PYTHONPATH": [os.path.join(self.source_folder, "modules")],
         }
+        tests = self._selected_tests()
+        workers = min(
+            len(tests),
+            int(tools.get_env("CONAN_B2_TEST_WORKERS", tools.cpu_count())),
+        )
+        workers = max(1, workers)
+        jobs = max(1, tools.cpu_count() // workers)
+        self.output.info(
+            "Running %s tests with %s workers, %s jobs each"
+            % (len(tests), workers, jobs)
+        )
+
+        started = time.time()
         with tools.environment_append(env):
-            for test_name in self._tests:
-                self.run_test(test_name)
+            with concurrent.futures.ThreadPoolExecutor(workers) as pool:
+                futures = [
+                    pool.submit(self.run_test, test_name, jobs)
+                    for test_name in tests
+                ]
+                results = [future.result() for future in futures]
+        elapsed = time.time() - started
+
+        self._report(results, elapsed)
+        failed = [r["name"] for r in results if r["result"] != 0]
+        if failed:
+            raise ConanException("Failed tests: %s" % ", ".join(failed))
+
+    def _selected_tests(self):
+        selected = tools.get_env("CONAN_B2_TEST_SCENARIOS")
+        if not selected:
+            return self._tests
+        selected = [s.strip() for s in selected.split(",") if s.strip()]
+        unknown = [s for s in selected if s not in self._tests]
+        if unknown:
+            raise ConanException("Unknown tests: %s" % ", ".join(unknown))
+        return [t for t in self._tests if t in selected]
+
+    def run_test(self, test_name, jobs):
+        """
+        Runs the commands of test `test_name` in its own directory with its
+        own temporary directory and `jobs` parallel jobs. Output goes to
+        `<test_name>.log`. Returns a dict with the test's name, result,
+        duration and log file.
+        """
 
-    def run_test(self, test_name):
         self.output.info("Running test %s" % test_name)
-        tools.mkdir(test_name)
-        with tools.chdir(test_name):
-            test_path = os.path.join(self.source_folder, test_name)
-            self.run(self._intall_cmd % test_path)
-            self.run(self._source_cmd % test_path)
-            self.run(self._build_cmd % test_path)
-            self.run(self._package_cmd % test_path)
+        directory = os.path.abspath(test_name)
+        temp = os.path.join(directory, "tmp", "temp")
+        tools.mkdir(temp)
+        log = os.path.abspath(test_name + ".log")
+        env = dict(os.environ, CONAN_CPU_COUNT=str(jobs), TMPDIR=temp)
+        test_path = os.path.join(self.source_folder, test_name)
+
+        started = time.time()
+        result = 0
+        with open(log, "w") as output:
+            for command in self._commands:
+                argv = ["conan"] + [
+                    test_path if arg == "%s" else arg for arg in command
+                ]
+                output.write("$ %s\n" % " ".join(argv))
+                output.flush()
+                result = subprocess.call(
+                    argv,
+                    cwd=directory,
+                    env=env,
+                    stdout=output,
+                    stderr=subprocess.STDOUT,
+                )
+                if result != 0:
+                    break
+        duration = time.time() - started
+
+        if result != 0:
+            with open(log) as output:
+                lines = output.readlines()
+            self.output.error(
+                "Test %s failed, last lines of %s:\n%s"
+                % (test_name, log, "".join(lines[-40:]))
+            )
+        else:
+            self.output.info(
+                "Test %s passed in %.1fs" % (test_name, duration)
+            )
+        return dict(
+            name=test_name, result=result, duration=duration, log=log,
+        )
+
+    def _report(self, results, elapsed):
+        width = max(len(r["name"]) for r in results)
+        lines = ["%-*s  %-6s  %8s" % (width, "test", "result", "time")]
+        for r in sorted(results, key=lambda r: r["duration"], reverse=True):
+            lines.append("%-*s  %-6s  %7.1fs" % (
+                width,
+                r["name"],
+                "passed" if r["result"] == 0 else "FAILED",
+                r["duration"],
+            ))
+        lines.append(
+            "%s tests in %.1fs (%.1fs sequentially)"
+            % (len(results), elapsed, sum(r["duration"] for r in results))
+        )
+        self.output.info("\n" + "\n".join(lines))
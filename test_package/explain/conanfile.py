@@ -0,0 +1,45 @@
+# Copyright (c) 2020 Dmitry Arkhipov <grisumbras@gmail.com>
+#
+# Distributed under the Boost Software License, Version 1.0. (See accompanying
+# file LICENSE or copy at http://www.boost.org/LICENSE_1_0.txt)
+
+
+from conans import (
+    ConanFile,
+    tools,
+)
+from get_helper_package import package_ref
+import os
+import time
+
+
+class MyConan(ConanFile):
+    """Reasons for rebuilding targets are reported"""
+
+    build_requires = "b2/[*]"
+    python_requires = package_ref
+    python_requires_extend = "b2-helper.Mixin"
+
+    settings = "os", "compiler", "build_type", "arch",
+    exports_sources = "*.cpp", "*.hpp", "*.jam"
+
+    def b2_setup_builder(self, builder):
+        builder.explain = True
+        self._builder = builder
+        return builder
+
+    def build(self):
+        super(MyConan, self).build()
+
+        # make sure the header is newer than the object file
+        time.sleep(1)
+        header = os.path.join(self.source_folder, "config.hpp")
+        with open(header, "a") as f:
+            f.write("\n")
+        self._builder.build()
+
+        report = tools.load(self._builder.explain_file())
+        changed = report.split("Changed inputs")[1].split("Rebuilt targets")[0]
+        assert "config.hpp" in changed
+        assert "main.cpp" not in changed
+        assert "main.o: outdated" in report
@@ -0,0 +1,49 @@
+# Copyright (c) 2020 Dmitry Arkhipov <grisumbras@gmail.com>
+#
+# Distributed under the Boost Software License, Version 1.0. (See accompanying
+# file LICENSE or copy at http://www.boost.org/LICENSE_1_0.txt)
+
+
+from conans import (
+    ConanFile,
+    tools,
+)
+from get_helper_package import package_ref
+import json
+import os
+
+
+class MyConan(ConanFile):
+    """Only changed files are installed and stale files are removed"""
+
+    build_requires = "b2/[*]"
+    python_requires = package_ref
+    python_requires_extend = "b2-helper.Mixin"
+    exports_sources = "*.jam", "*.cpp", "*.hpp"
+
+    def b2_setup_builder(self, builder):
+        builder.incremental_install = True
+        self._builder = builder
+        return builder
+
+    def package(self):
+        super(MyConan, self).package()
+        header = os.path.join("include", "config.hpp")
+        report = self._builder.install_report
+        assert header in report["added"]
+        assert report["updated"] == report["removed"] == []
+
+        # a file that was installed before, but is no longer produced
+        stale = os.path.join(self.package_folder, "stale.txt")
+        tools.save(stale, "")
+        installed = os.path.join(
+            self.build_folder, "b2-helper-installed.json"
+        )
+        files = json.loads(tools.load(installed))
+        files["stale.txt"] = dict(size=0, mtime=0, digest="")
+        tools.save(installed, json.dumps(files))
+
+        self._builder.install()
+        report = self._builder.install_report
+        assert report == dict(added=[], updated=[], removed=["stale.txt"])
+        assert not os.path.exists(stale)
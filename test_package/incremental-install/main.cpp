@@ -0,0 +1,11 @@
+/*
+ * Copyright (c) 2020 Dmitry Arkhipov <grisumbras@gmail.com>
+ *
+ * Distributed under the Boost Software License, Version 1.0. (See accompanying
+ * file LICENSE or copy at http://www.boost.org/LICENSE_1_0.txt)
+ */
+
+
+#include "config.hpp"
+
+int main() {}
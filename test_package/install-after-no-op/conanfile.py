@@ -0,0 +1,59 @@
+# Copyright (c) 2020 Dmitry Arkhipov <grisumbras@gmail.com>
+#
+# Distributed under the Boost Software License, Version 1.0. (See accompanying
+# file LICENSE or copy at http://www.boost.org/LICENSE_1_0.txt)
+
+
+from conans import (
+    ConanFile,
+    tools,
+)
+from get_helper_package import package_ref
+import os
+
+
+class MyConan(ConanFile):
+    """Install manifest survives a rebuild that was skipped"""
+
+    build_requires = "b2/[*]"
+    python_requires = package_ref
+    python_requires_extend = "b2-helper.Mixin"
+    exports_sources = "*.jam", "*.cpp"
+
+    def b2_setup_builder(self, builder):
+        builder.install_manifest = True
+        builder.up_to_date_check = "stat"
+        return builder
+
+    def build(self):
+        super(MyConan, self).build()
+        manifest = os.path.join(self.build_folder, "b2-helper-install.json")
+        recorded = tools.load(manifest)
+
+        runs = self._runs
+        super(MyConan, self).build()
+        assert self._runs == runs
+        assert tools.load(manifest) == recorded
+
+        # without the manifest the rebuild can't be skipped
+        os.remove(manifest)
+        super(MyConan, self).build()
+        assert self._runs == runs + 1
+        assert tools.load(manifest) == recorded
+
+    def package(self):
+        runs = self._runs
+        jobs = str(tools.cpu_count() + 1)
+        with tools.environment_append({"CONAN_CPU_COUNT": jobs}):
+            super(MyConan, self).package()
+        assert self._runs == runs
+        ext = ".exe" if tools.os_info.is_windows else ""
+        assert os.path.exists(
+            os.path.join(self.package_folder, "bin", "main" + ext)
+        )
+
+    _runs = 0
+
+    def run(self, *args, **kw):
+        self._runs += 1
+        return super(MyConan, self).run(*args, **kw)
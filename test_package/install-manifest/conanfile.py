@@ -0,0 +1,46 @@
+# Copyright (c) 2020 Dmitry Arkhipov <grisumbras@gmail.com>
+#
+# Distributed under the Boost Software License, Version 1.0. (See accompanying
+# file LICENSE or copy at http://www.boost.org/LICENSE_1_0.txt)
+
+
+from conans import (
+    ConanFile,
+    tools,
+)
+from get_helper_package import package_ref
+import os
+
+
+class MyConan(ConanFile):
+    """package() replays install actions recorded by build()"""
+
+    build_requires = "b2/[*]"
+    python_requires = package_ref
+    python_requires_extend = "b2-helper.Mixin"
+    exports_sources = "*.jam", "*.cpp"
+
+    def b2_setup_builder(self, builder):
+        builder.install_manifest = True
+        return builder
+
+    def build(self):
+        super(MyConan, self).build()
+        assert not os.path.exists(self._installed)
+
+    def package(self):
+        runs = self._runs
+        super(MyConan, self).package()
+        assert self._runs == runs
+        assert os.path.exists(self._installed)
+
+    @property
+    def _installed(self):
+        ext = ".exe" if tools.os_info.is_windows else ""
+        return os.path.join(self.package_folder, "bin", "main" + ext)
+
+    _runs = 0
+
+    def run(self, *args, **kw):
+        self._runs += 1
+        return super(MyConan, self).run(*args, **kw)
@@ -0,0 +1,31 @@
+# Copyright (c) 2020 Dmitry Arkhipov <grisumbras@gmail.com>
+#
+# Distributed under the Boost Software License, Version 1.0. (See accompanying
+# file LICENSE or copy at http://www.boost.org/LICENSE_1_0.txt)
+
+
+from conans import (
+    ConanFile,
+    tools,
+)
+from get_helper_package import package_ref
+import os
+
+
+class MyConan(ConanFile):
+    """Artifacts are installed as hard links"""
+
+    build_requires = "b2/[*]"
+    python_requires = package_ref
+    python_requires_extend = "b2-helper.Mixin"
+    exports_sources = "*.jam", "*.cpp"
+
+    def b2_setup_builder(self, builder):
+        builder.install_mode = "hardlink"
+        return builder
+
+    def package(self):
+        super(MyConan, self).package()
+        ext = ".exe" if tools.os_info.is_windows else ""
+        installed = os.path.join(self.package_folder, "bin", "main" + ext)
+        assert os.stat(installed).st_nlink > 1
@@ -0,0 +1,107 @@
+# Copyright (c) 2020 Dmitry Arkhipov <grisumbras@gmail.com>
+#
+# Distributed under the Boost Software License, Version 1.0. (See accompanying
+# file LICENSE or copy at http://www.boost.org/LICENSE_1_0.txt)
+
+
+from conans import ConanFile, tools
+from conans.errors import ConanException
+from get_helper_package import package_ref
+import os
+
+
+MiB = 1024 * 1024
+
+
+class MyConan(ConanFile):
+    """Number of jobs is limited by cgroup quotas and available memory"""
+
+    build_requires = "b2/[*]"
+    python_requires = package_ref
+    python_requires_extend = "b2-helper.Mixin"
+    exports_sources = "*.jam", "*.cpp"
+
+    def build(self):
+        b2 = self.python_requires["b2-helper"].module
+        none = self._folder("none")
+        # only CPU affinity applies without cgroup filesystem
+        cpus = b2.cpu_limit(none, none)
+
+        # cgroup v2: a single unified hierarchy
+        v2 = self._folder("v2")
+        self._save(v2, "proc/self/cgroup", "0::/user.slice/session\n")
+        self._save(v2, "proc/meminfo", "MemAvailable:    4194304 kB\n")
+        root, proc = os.path.join(v2, "cgroup"), os.path.join(v2, "proc")
+        group = os.path.join(root, "user.slice", "session")
+        tools.save(os.path.join(group, "cpu.max"), "150000 100000\n")
+        tools.save(os.path.join(group, "memory.max"), str(1024 * MiB))
+        tools.save(os.path.join(group, "memory.current"), str(256 * MiB))
+
+        directories = list(b2.cgroup_directories("memory", root, proc))
+        assert directories == [root, group], directories
+        assert b2.cpu_limit(root, proc) == min(2, cpus or 2)
+        assert b2.available_memory(root, proc) == 768 * MiB
+
+        # quota is lifted and memory is limited by /proc/meminfo
+        tools.save(os.path.join(group, "cpu.max"), "max 100000\n")
+        tools.save(os.path.join(group, "memory.max"), "max\n")
+        assert b2.cpu_limit(root, proc) == cpus
+        assert b2.available_memory(root, proc) == 4096 * MiB
+
+        # cgroup v1: a hierarchy per controller
+        v1 = self._folder("v1")
+        self._save(
+            v1,
+            "proc/self/cgroup",
+            "5:memory:/docker/container\n"
+            "4:cpu,cpuacct:/docker/container\n"
+            "1:name=systemd:/docker/container\n",
+        )
+        root, proc = os.path.join(v1, "cgroup"), os.path.join(v1, "proc")
+        group = os.path.join(root, "memory", "docker", "container")
+        tools.save(
+            os.path.join(group, "memory.limit_in_bytes"), str(512 * MiB)
+        )
+        tools.save(
+            os.path.join(group, "memory.usage_in_bytes"), str(128 * MiB)
+        )
+        cpu = os.path.join(root, "cpu", "docker", "container")
+        tools.save(os.path.join(cpu, "cpu.cfs_quota_us"), "50000\n")
+        tools.save(os.path.join(cpu, "cpu.cfs_period_us"), "100000\n")
+
+        directories = list(b2.cgroup_directories("memory", root, proc))
+        assert directories == [os.path.join(root, "memory"), group, root], (
+            directories
+        )
+        assert b2.cpu_limit(root, proc) == 1
+        assert b2.available_memory(root, proc) == 384 * MiB
+
+        # unlimited quota
+        tools.save(os.path.join(cpu, "cpu.cfs_quota_us"), "-1\n")
+        assert b2.cpu_limit(root, proc) == cpus
+
+        # nothing is known without proc and cgroup filesystems
+        assert list(b2.cgroup_directories("memory", none, none)) == []
+        assert b2.available_memory(none, none) is None
+
+        with tools.environment_append({"CONAN_CPU_COUNT": "3"}):
+            assert b2.job_count() == (3, "set by CONAN_CPU_COUNT")
+            assert b2.job_count(1) == (3, "set by CONAN_CPU_COUNT")
+
+        with tools.environment_append({
+            "CONAN_CPU_COUNT": None, "CONAN_B2_JOB_MEMORY": "1G",
+        }):
+            try:
+                b2.job_count()
+            except ConanException as e:
+                assert "CONAN_B2_JOB_MEMORY" in str(e), str(e)
+            else:
+                assert False, "invalid CONAN_B2_JOB_MEMORY was accepted"
+
+        super(MyConan, self).build()
+
+    def _folder(self, name):
+        return os.path.join(self.build_folder, "cgroup-" + name)
+
+    def _save(self, folder, path, content):
+        tools.save(os.path.join(folder, path), content)
@@ -0,0 +1,30 @@
+# Copyright (c) 2020 Dmitry Arkhipov <grisumbras@gmail.com>
+#
+# Distributed under the Boost Software License, Version 1.0. (See accompanying
+# file LICENSE or copy at http://www.boost.org/LICENSE_1_0.txt)
+
+
+from conans import ConanFile
+from get_helper_package import package_ref
+import os
+
+
+class MyConan(ConanFile):
+    """Link actions are run through the limiting launcher"""
+
+    build_requires = "b2/[*]"
+    python_requires = package_ref
+    python_requires_extend = "b2-helper.Mixin"
+
+    settings = "os", "compiler", "build_type", "arch",
+    exports_sources = "*.cpp", "*.jam"
+
+    def b2_setup_builder(self, builder):
+        builder.link_jobs = 1
+        builder.link_locks = os.path.join(self.build_folder, "locks")
+        return builder
+
+    def build(self):
+        super(MyConan, self).build()
+        locks = os.path.join(self.build_folder, "locks")
+        assert os.listdir(locks) == ["slot-0.lock"], os.listdir(locks)
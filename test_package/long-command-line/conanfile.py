@@ -0,0 +1,28 @@
+# Copyright (c) 2020 Dmitry Arkhipov <grisumbras@gmail.com>
+#
+# Distributed under the Boost Software License, Version 1.0. (See accompanying
+# file LICENSE or copy at http://www.boost.org/LICENSE_1_0.txt)
+
+
+from conans import ConanFile
+from get_helper_package import package_ref
+import os
+
+
+class MyConan(ConanFile):
+    """Build request that doesn't fit into command line is passed via a file"""
+
+    build_requires = "b2/[*]"
+    python_requires = package_ref
+    python_requires_extend = "b2-helper.Mixin"
+    exports_sources = "*.jam", "*.cpp"
+
+    def b2_setup_builder(self, builder):
+        builder.command_line_limit = 0
+        builder.add_variant(define='ANSWER="6 * 7"')
+        return builder
+
+    def build(self):
+        super(MyConan, self).build()
+        request = os.path.join(self.build_folder, "b2-helper-request.jam")
+        assert os.path.exists(request)
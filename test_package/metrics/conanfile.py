@@ -0,0 +1,57 @@
+# Copyright (c) 2020 Dmitry Arkhipov <grisumbras@gmail.com>
+#
+# Distributed under the Boost Software License, Version 1.0. (See accompanying
+# file LICENSE or copy at http://www.boost.org/LICENSE_1_0.txt)
+
+
+from conans import (
+    ConanFile,
+    tools,
+)
+from get_helper_package import package_ref
+import json
+import subprocess
+import sys
+
+
+class MyConan(ConanFile):
+    """Resource usage is recorded for every phase"""
+
+    build_requires = "b2/[*]"
+    python_requires = package_ref
+    python_requires_extend = "b2-helper.Mixin"
+
+    settings = "os", "compiler", "build_type", "arch",
+    exports_sources = "*.cpp", "*.jam"
+
+    def b2_setup_builder(self, builder):
+        self._builder = builder
+        return builder
+
+    def build(self):
+        super(MyConan, self).build()
+        metrics = self._metrics()
+        assert list(metrics) == ["build"]
+        assert metrics["build"]["wall_time"] > 0
+
+        if tools.os_info.is_linux:
+            assert metrics["build"]["user_time"] > 0
+            assert metrics["build"]["peak_rss"] > 0
+            assert metrics["build"]["write_bytes"] >= 0
+
+    def package(self):
+        # a large process that finished before the install run is not
+        # attributed to it
+        large = 300 * 1024 * 1024
+        subprocess.check_call([
+            sys.executable, "-c", "b = b'x' * %s" % large,
+        ])
+        super(MyConan, self).package()
+        metrics = self._metrics()
+        assert sorted(metrics) == ["build", "install"]
+        assert metrics["install"]["targets"] == ["install"]
+        if tools.os_info.is_linux:
+            assert metrics["install"].get("peak_rss", 0) < large, metrics
+
+    def _metrics(self):
+        return json.loads(tools.load(self._builder.metrics_file))
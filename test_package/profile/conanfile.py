@@ -0,0 +1,36 @@
+# Copyright (c) 2020 Dmitry Arkhipov <grisumbras@gmail.com>
+#
+# Distributed under the Boost Software License, Version 1.0. (See accompanying
+# file LICENSE or copy at http://www.boost.org/LICENSE_1_0.txt)
+
+
+from conans import (
+    ConanFile,
+    tools,
+)
+from get_helper_package import package_ref
+
+
+class MyConan(ConanFile):
+    """Jam and Python profiles are written into one report"""
+
+    build_requires = "b2/[*]"
+    python_requires = package_ref
+    python_requires_extend = "b2-helper.Mixin"
+
+    settings = "os", "compiler", "build_type", "arch",
+    exports_sources = "*.cpp", "*.jam"
+
+    def b2_setup_builder(self, builder):
+        builder.profile = "jam,python"
+        self._builder = builder
+        return builder
+
+    def build(self):
+        super(MyConan, self).build()
+
+        report = tools.load(self._builder.profile_file)
+        assert "Boost.Build rules by own time" in report
+        assert "modules.load" in report
+        assert "Python functions by cumulative time" in report
+        assert "(_render_config)" in report
@@ -0,0 +1,55 @@
+# Copyright (c) 2020 Dmitry Arkhipov <grisumbras@gmail.com>
+#
+# Distributed under the Boost Software License, Version 1.0. (See accompanying
+# file LICENSE or copy at http://www.boost.org/LICENSE_1_0.txt)
+
+
+from conans import (
+    ConanFile,
+    tools,
+)
+from get_helper_package import package_ref
+import os
+
+
+class MyConan(ConanFile):
+    """Only dependencies referenced by jamfiles are loaded"""
+
+    build_requires = "b2/[*]"
+    python_requires = package_ref
+    python_requires_extend = "b2-helper.Mixin"
+
+    settings = "os", "compiler", "build_type", "arch",
+    exports_sources = "*.cpp", "*.jam"
+
+    def b2_setup_builder(self, builder):
+        builder.prune_dependencies = True
+        return builder
+
+    def build(self):
+        super(MyConan, self).build()
+
+        # jamfiles don't mention package b2
+        config = os.path.join(self.build_folder, "project-config.jam")
+        config = tools.load(config)
+        assert "b2-helper-packages" in config
+        build_info = self._build_info()
+        assert "project-define b2 ;" not in tools.load(build_info)
+
+        b2 = self.python_requires["b2-helper"].module
+        builder = self.b2_setup_builder(b2.B2(self))
+        uses_b2 = os.path.join(self.build_folder, "uses-b2.jam")
+        tools.save(uses_b2, "local b2-package = /b2//libs ;\n")
+        builder.include.append(uses_b2)
+        assert builder.configure()
+        builder.build()
+
+        assert self._build_info() != build_info
+        assert not os.path.exists(build_info)
+        assert "project-define b2 ;" in tools.load(self._build_info())
+
+    def _build_info(self):
+        packages = os.path.join(self.build_folder, "b2-helper-packages")
+        entries = os.listdir(packages)
+        assert len(entries) == 1
+        return os.path.join(packages, entries[0], "conanbuildinfo.jam")
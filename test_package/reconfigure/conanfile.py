@@ -0,0 +1,31 @@
+# Copyright (c) 2020 Dmitry Arkhipov <grisumbras@gmail.com>
+#
+# Distributed under the Boost Software License, Version 1.0. (See accompanying
+# file LICENSE or copy at http://www.boost.org/LICENSE_1_0.txt)
+
+
+from conans import ConanFile
+from get_helper_package import package_ref
+import os
+
+
+class MyConan(ConanFile):
+    """Configuration file is not rewritten if it hasn't changed"""
+
+    build_requires = "b2/[*]"
+    python_requires = package_ref
+    python_requires_extend = "b2-helper.Mixin"
+    exports_sources = "*.jam", "*.cpp"
+
+    def build(self):
+        b2 = self.python_requires["b2-helper"].module
+        builder = self.b2_setup_builder(b2.B2(self))
+        assert builder.configure()
+        mtime = os.path.getmtime(builder.project_config)
+        assert not builder.configure()
+        assert os.path.getmtime(builder.project_config) == mtime
+
+        builder.properties.define = "RECONFIGURED"
+        assert builder.configure()
+        assert not builder.configure()
+        builder.build()
@@ -0,0 +1,66 @@
+# Copyright (c) 2020 Dmitry Arkhipov <grisumbras@gmail.com>
+#
+# Distributed under the Boost Software License, Version 1.0. (See accompanying
+# file LICENSE or copy at http://www.boost.org/LICENSE_1_0.txt)
+
+
+from conans import (
+    ConanFile,
+    tools,
+)
+from get_helper_package import package_ref
+import os
+
+
+class MyConan(ConanFile):
+    """Reproducible builds of several variants"""
+
+    build_requires = "b2/[*]"
+    python_requires = package_ref
+    python_requires_extend = "b2-helper.Mixin"
+
+    settings = "os", "compiler", "build_type", "arch",
+    exports_sources = "*.cpp", "*.jam"
+
+    def build(self):
+        b2 = self.python_requires["b2-helper"].module
+
+        # prefix maps of every toolset are kept when variants use different
+        # toolsets
+        builder = self.b2_setup_builder(b2.B2(self))
+        builder.properties.reproducible = True
+        builder.properties.toolset = "gcc"
+        builder.add_variant(variant="debug", toolset="clang")
+        builder.add_variant(variant="release")
+        config = builder._render_config()
+        requirements = config[config.index("project : requirements"):]
+        for toolset in ("gcc", "clang"):
+            for folder in (self.source_folder, self.build_folder):
+                assert "<toolset>%s:<cflags>-ffile-prefix-map=%s=" % (
+                    toolset, folder,
+                ) in requirements, (toolset, folder, requirements)
+        request = list(builder._build_request())
+        assert request == [
+            "variant=debug/toolset=clang", "variant=release/toolset=gcc",
+        ], request
+
+        builder = self.b2_setup_builder(b2.B2(self))
+        builder.properties.reproducible = True
+        builder.properties.debug_symbols = "on"
+        builder.add_variant(variant="debug")
+        builder.add_variant(variant="release")
+        builder.configure()
+        builder.build()
+        if self.settings.compiler not in ("gcc", "clang"):
+            return
+
+        exe = "main" + (".exe" if tools.os_info.is_windows else "")
+        exes = []
+        for root, _, files in os.walk(self.build_folder):
+            if exe in files:
+                exes.append(os.path.join(root, exe))
+                with open(exes[-1], "rb") as f:
+                    data = f.read()
+                for folder in (self.source_folder, self.build_folder):
+                    assert folder.encode() not in data, (exes[-1], folder)
+        assert len(exes) == 2, exes
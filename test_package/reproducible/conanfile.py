@@ -0,0 +1,41 @@
+# Copyright (c) 2020 Dmitry Arkhipov <grisumbras@gmail.com>
+#
+# Distributed under the Boost Software License, Version 1.0. (See accompanying
+# file LICENSE or copy at http://www.boost.org/LICENSE_1_0.txt)
+
+
+from conans import (
+    ConanFile,
+    tools,
+)
+from get_helper_package import package_ref
+import os
+
+
+class MyConan(ConanFile):
+    """Built binaries don't contain absolute source and build paths"""
+
+    build_requires = "b2/[*]"
+    python_requires = package_ref
+    python_requires_extend = "b2-helper.Mixin"
+
+    settings = "os", "compiler", "build_type", "arch",
+    exports_sources = "*.cpp", "*.jam"
+
+    def b2_setup_builder(self, builder):
+        builder.properties.reproducible = True
+        builder.properties.debug_symbols = "on"
+        return builder
+
+    def build(self):
+        super(MyConan, self).build()
+        if self.settings.compiler not in ("gcc", "clang"):
+            return
+
+        exe = "main" + (".exe" if tools.os_info.is_windows else "")
+        for root, _, files in os.walk(self.build_folder):
+            if exe in files:
+                with open(os.path.join(root, exe), "rb") as f:
+                    data = f.read()
+                for folder in (self.source_folder, self.build_folder):
+                    assert folder.encode() not in data, folder
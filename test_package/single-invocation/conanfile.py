@@ -0,0 +1,41 @@
+# Copyright (c) 2020 Dmitry Arkhipov <grisumbras@gmail.com>
+#
+# Distributed under the Boost Software License, Version 1.0. (See accompanying
+# file LICENSE or copy at http://www.boost.org/LICENSE_1_0.txt)
+
+
+from conans import (
+    ConanFile,
+    tools,
+)
+from get_helper_package import package_ref
+import os
+
+
+class MyConan(ConanFile):
+    """Build, test and install happen in one b2 run"""
+
+    build_requires = "b2/[*]"
+    python_requires = package_ref
+    python_requires_extend = "b2-helper.Mixin"
+    exports_sources = "*.jam", "*.cpp"
+
+    b2_single_invocation = True
+
+    def build(self):
+        super(MyConan, self).build()
+        assert os.path.exists(self._installed_exe)
+
+    def package(self):
+        os.remove(self._installed_exe)
+        # the number of jobs doesn't affect what was built
+        jobs = str(tools.cpu_count() + 1)
+        with tools.environment_append({"CONAN_CPU_COUNT": jobs}):
+            super(MyConan, self).package()
+        # package() did not run b2 again
+        assert not os.path.exists(self._installed_exe)
+
+    @property
+    def _installed_exe(self):
+        ext = ".exe" if tools.os_info.is_windows else ""
+        return os.path.join(self.package_folder, "bin", "main" + ext)
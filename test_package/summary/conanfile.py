@@ -0,0 +1,34 @@
+# Copyright (c) 2020 Dmitry Arkhipov <grisumbras@gmail.com>
+#
+# Distributed under the Boost Software License, Version 1.0. (See accompanying
+# file LICENSE or copy at http://www.boost.org/LICENSE_1_0.txt)
+
+
+from conans import ConanFile
+from get_helper_package import package_ref
+
+
+class MyConan(ConanFile):
+    """Summary of Boost.Build run is available after build"""
+
+    build_requires = "b2/[*]"
+    python_requires = package_ref
+    python_requires_extend = "b2-helper.Mixin"
+
+    settings = "os", "compiler", "build_type", "arch",
+    exports_sources = "*.cpp", "*.jam"
+
+    def b2_setup_builder(self, builder):
+        self._builder = builder
+        return builder
+
+    def build(self):
+        super(MyConan, self).build()
+
+        summary = self._builder.summary
+        assert summary["found"] > 0
+        assert summary["updated"] > 0
+        assert summary["actions"] > 0
+        assert summary["failed"] == 0
+        assert summary["failed_actions"] == []
+        assert summary["total"] >= summary["running"]
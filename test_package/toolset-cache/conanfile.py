@@ -0,0 +1,46 @@
+# Copyright (c) 2020 Dmitry Arkhipov <grisumbras@gmail.com>
+#
+# Distributed under the Boost Software License, Version 1.0. (See accompanying
+# file LICENSE or copy at http://www.boost.org/LICENSE_1_0.txt)
+
+
+from conans import (
+    ConanFile,
+    tools,
+)
+from get_helper_package import package_ref
+import os
+
+
+class MyConan(ConanFile):
+    """Toolset detection results are cached and reused"""
+
+    build_requires = "b2/[*]"
+    python_requires = package_ref
+    python_requires_extend = "b2-helper.Mixin"
+
+    settings = "os", "compiler", "build_type", "arch",
+    exports_sources = "*.cpp", "*.jam"
+
+    def b2_setup_builder(self, builder):
+        builder.toolset_cache = os.path.join(self.build_folder, "toolsets")
+        return builder
+
+    def build(self):
+        super(MyConan, self).build()
+
+        cache = os.path.join(self.build_folder, "toolsets")
+        entries = [os.path.join(cache, f) for f in os.listdir(cache)]
+        assert len(entries) == 1
+        assert ".b2-helper-shell." in tools.load(entries[0])
+        modified = os.stat(entries[0]).st_mtime_ns
+
+        b2 = self.python_requires["b2-helper"].module
+        builder = self.b2_setup_builder(b2.B2(self))
+        builder.build_folder = "second"
+        builder.configure()
+        builder.build()
+
+        assert os.listdir(cache) == [os.path.basename(entries[0])]
+        assert os.stat(entries[0]).st_mtime_ns == modified
+        assert entries[0] in tools.load(builder.project_config)
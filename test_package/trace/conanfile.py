@@ -0,0 +1,39 @@
+# Copyright (c) 2020 Dmitry Arkhipov <grisumbras@gmail.com>
+#
+# Distributed under the Boost Software License, Version 1.0. (See accompanying
+# file LICENSE or copy at http://www.boost.org/LICENSE_1_0.txt)
+
+
+from conans import (
+    ConanFile,
+    tools,
+)
+from get_helper_package import package_ref
+import json
+
+
+class MyConan(ConanFile):
+    """Action timings are written in Chrome trace format"""
+
+    build_requires = "b2/[*]"
+    python_requires = package_ref
+    python_requires_extend = "b2-helper.Mixin"
+
+    settings = "os", "compiler", "build_type", "arch",
+    exports_sources = "*.cpp", "*.jam"
+
+    def b2_setup_builder(self, builder):
+        builder.trace = True
+        self._builder = builder
+        return builder
+
+    def build(self):
+        super(MyConan, self).build()
+
+        trace = json.loads(tools.load(self._builder.trace_file))
+        events = [e for e in trace["traceEvents"] if e["ph"] == "X"]
+        assert sorted(e["cat"] for e in events) == ["compile.c++", "link"]
+        assert "main.o" in [e["name"] for e in events]
+        for event in events:
+            assert event["tid"] < self._builder.options.j
+            assert event["args"]["result"] == 0
@@ -0,0 +1,72 @@
+# Copyright (c) 2020 Dmitry Arkhipov <grisumbras@gmail.com>
+#
+# Distributed under the Boost Software License, Version 1.0. (See accompanying
+# file LICENSE or copy at http://www.boost.org/LICENSE_1_0.txt)
+
+
+from conans import ConanFile
+from get_helper_package import package_ref
+import os
+
+
+class MyConan(ConanFile):
+    """b2 isn't run when nothing changed since the last run"""
+
+    build_requires = "b2/[*]"
+    python_requires = package_ref
+    python_requires_extend = "b2-helper.Mixin"
+    exports_sources = "*.jam", "*.cpp"
+
+    def b2_setup_builder(self, builder):
+        builder.up_to_date_check = "stat"
+        return builder
+
+    def build(self):
+        super(MyConan, self).build()
+        runs = self._runs
+
+        b2 = self.python_requires["b2-helper"].module
+        builder = self.b2_setup_builder(b2.B2(self))
+        builder.configure()
+        builder.build()
+        assert self._runs == runs
+
+        with open(os.path.join(self.source_folder, "main.cpp"), "a") as f:
+            f.write("\n")
+        builder.build()
+        assert self._runs == runs + 1
+
+        # contents of a build folder inside the source folder are not read
+        builder = self.b2_setup_builder(b2.B2(self))
+        builder.up_to_date_check = "hash"
+        builder.build_folder = os.path.join(self.source_folder, "build")
+        builder.configure()
+        builder.build()
+        runs = self._runs
+
+        digested = []
+        file_digest = b2.file_digest
+
+        def recording_digest(path):
+            digested.append(path)
+            return file_digest(path)
+
+        b2.file_digest = recording_digest
+        try:
+            builder.build()
+        finally:
+            b2.file_digest = file_digest
+        assert self._runs == runs
+        inside = os.path.join(builder.build_folder, "")
+        assert digested, digested
+        outputs = [
+            p for p in digested
+            if p.startswith(inside) and p != builder.project_config
+        ]
+        assert not outputs, outputs
+
+    _runs = 0
+
+    def run(self, *args, **kw):
+        self._runs += 1
+        return super(MyConan, self).run(*args, **kw)
@@ -0,0 +1,38 @@
+# Copyright (c) 2020 Dmitry Arkhipov <grisumbras@gmail.com>
+#
+# Distributed under the Boost Software License, Version 1.0. (See accompanying
+# file LICENSE or copy at http://www.boost.org/LICENSE_1_0.txt)
+
+
+from conans import (
+    ConanFile,
+    tools,
+)
+from get_helper_package import package_ref
+import os
+
+
+class MyConan(ConanFile):
+    """Several variants are built in one b2 run"""
+
+    settings = "build_type"
+    build_requires = "b2/[*]"
+    python_requires = package_ref
+    python_requires_extend = "b2-helper.Mixin"
+    exports_sources = "*.jam", "*.cpp"
+
+    def build(self):
+        b2 = self.python_requires["b2-helper"].module
+        builder = self.b2_setup_builder(b2.B2(self))
+        builder.add_variant(variant="debug")
+        builder.add_variant(variant="release", link="static")
+        builder.configure()
+        builder.build()
+
+        ext = ".exe" if tools.os_info.is_windows else ""
+        exes = [
+            os.path.join(root, "main" + ext)
+            for root, _, files in os.walk(builder.build_folder)
+            if "main" + ext in files
+        ]
+        assert len(exes) == 2, exes
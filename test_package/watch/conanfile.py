@@ -0,0 +1,82 @@
+# Copyright (c) 2020 Dmitry Arkhipov <grisumbras@gmail.com>
+#
+# Distributed under the Boost Software License, Version 1.0. (See accompanying
+# file LICENSE or copy at http://www.boost.org/LICENSE_1_0.txt)
+
+
+from conans import (
+    ConanFile,
+    tools,
+)
+from conans.errors import ConanException
+from get_helper_package import package_ref
+import glob
+import os
+import threading
+
+
+class MyConan(ConanFile):
+    """Targets are rebuilt when sources change"""
+
+    build_requires = "b2/[*]"
+    python_requires = package_ref
+    python_requires_extend = "b2-helper.Mixin"
+
+    settings = "os", "compiler", "build_type", "arch",
+    exports_sources = "*.cpp", "*.jam"
+
+    def build(self):
+        b2 = self.python_requires["b2-helper"].module
+        builder = b2.B2(self)
+        builder.configure()
+
+        output = self.output
+        for polling in (False, True):
+            watching = threading.Event()
+            self.output = WatchedOutput(output, watching)
+            edit = threading.Thread(target=self._edit, args=(watching,))
+            edit.start()
+            builder.watch("main", builds=2, polling=polling)
+            edit.join()
+            self.output = output
+            assert self._modified
+            assert os.stat(self._executable()).st_mtime >= self._modified
+
+        # outputs would be written into the watched folder
+        builder.build_folder = self.source_folder
+        try:
+            builder.watch("main", builds=1)
+        except ConanException as e:
+            assert "inside build folder" in str(e)
+        else:
+            assert False, "watching a build folder should fail"
+
+    def _edit(self, watching):
+        self._modified = None
+        if not watching.wait(120):
+            return
+        source = os.path.join(self.source_folder, "main.cpp")
+        tools.save(source, tools.load(source) + "\n// edited\n")
+        self._modified = os.stat(source).st_mtime
+
+    def _executable(self):
+        found = glob.glob(
+            os.path.join(self.build_folder, "**", "main"), recursive=True
+        )
+        return [f for f in found if os.path.isfile(f)][0]
+
+
+class WatchedOutput(object):
+    """Signals when the helper starts watching for changes"""
+
+    def __init__(self, output, watching):
+        self._output = output
+        self._watching = watching
+
+    def __getattr__(self, name):
+        return getattr(self._output, name)
+
+    def info(self, message):
+        self._output.info(message)
+        if message == "Watching for changes":
+            self._watching.set()